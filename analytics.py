@@ -0,0 +1,86 @@
+# analytics.py
+# Correlation statistics computed inside MongoDB: a single aggregation
+# returns Pearson and Spearman coefficients, per-field summaries, $bucketAuto
+# histograms and a bounded $sample for scatter plots, instead of sending
+# every pair of values to the client.
+from config import ANALYTICS_BINS, ANALYTICS_SAMPLE_SIZE
+
+# Numeric fields of the raw films collection, some stored as strings
+ANALYTICS_FIELDS = ["Runtime (Minutes)", "Revenue (Millions)", "rating", "Votes", "Metascore", "year"]
+
+def as_double(field):
+    return {"$convert": {"input": f"${field}", "to": "double", "onError": None, "onNull": None}}
+
+def pearson_stages(x, y):
+    # r = (n*Sxy - Sx*Sy) / sqrt((n*Sxx - Sx^2) * (n*Syy - Sy^2)), from sums in one $group
+    return [
+        {"$group": {
+            "_id": None,
+            "n": {"$sum": 1},
+            "sx": {"$sum": f"${x}"},
+            "sy": {"$sum": f"${y}"},
+            "sxx": {"$sum": {"$multiply": [f"${x}", f"${x}"]}},
+            "syy": {"$sum": {"$multiply": [f"${y}", f"${y}"]}},
+            "sxy": {"$sum": {"$multiply": [f"${x}", f"${y}"]}}
+        }},
+        {"$project": {
+            "_id": 0,
+            "n": 1,
+            "r": {"$let": {
+                "vars": {
+                    "cov": {"$subtract": [{"$multiply": ["$n", "$sxy"]}, {"$multiply": ["$sx", "$sy"]}]},
+                    "var": {"$multiply": [
+                        {"$subtract": [{"$multiply": ["$n", "$sxx"]}, {"$multiply": ["$sx", "$sx"]}]},
+                        {"$subtract": [{"$multiply": ["$n", "$syy"]}, {"$multiply": ["$sy", "$sy"]}]}
+                    ]}
+                },
+                "in": {"$cond": [{"$gt": ["$$var", 0]}, {"$divide": ["$$cov", {"$sqrt": "$$var"}]}, None]}
+            }}
+        }}
+    ]
+
+def rank_stages(field, output):
+    # Average rank, so tied values share the mean of the ranks they span
+    return [
+        {"$setWindowFields": {"sortBy": {field: 1}, "output": {f"{output}_min": {"$rank": {}}}}},
+        {"$setWindowFields": {"partitionBy": f"${field}", "output": {f"{output}_ties": {"$count": {}}}}},
+        {"$set": {output: {"$add": [f"${output}_min", {"$divide": [{"$subtract": [f"${output}_ties", 1]}, 2]}]}}}
+    ]
+
+def summary_stages(field):
+    return [{"$group": {
+        "_id": None,
+        "min": {"$min": f"${field}"},
+        "max": {"$max": f"${field}"},
+        "mean": {"$avg": f"${field}"},
+        "std": {"$stdDevPop": f"${field}"}
+    }}, {"$project": {"_id": 0}}]
+
+def correlation_pipeline(x_field, y_field, bins=ANALYTICS_BINS, sample_size=ANALYTICS_SAMPLE_SIZE):
+    # One document out: {"pearson", "spearman", "x_summary", "y_summary",
+    # "x_histogram", "y_histogram", "sample"}, each a list from $facet
+    return [
+        {"$project": {"_id": 0, "x": as_double(x_field), "y": as_double(y_field)}},
+        {"$match": {"x": {"$ne": None}, "y": {"$ne": None}}},
+        {"$facet": {
+            "pearson": pearson_stages("x", "y"),
+            "spearman": rank_stages("x", "rx") + rank_stages("y", "ry") + pearson_stages("rx", "ry"),
+            "x_summary": summary_stages("x"),
+            "y_summary": summary_stages("y"),
+            "x_histogram": [{"$bucketAuto": {"groupBy": "$x", "buckets": bins}}],
+            "y_histogram": [{"$bucketAuto": {"groupBy": "$y", "buckets": bins}}],
+            "sample": [{"$sample": {"size": sample_size}}]
+        }}
+    ]
+
+def correlation_report(collection, x_field, y_field, bins=ANALYTICS_BINS, sample_size=ANALYTICS_SAMPLE_SIZE):
+    # Flattens the $facet document: single-row facets become dicts (or None)
+    document = next(collection.aggregate(correlation_pipeline(x_field, y_field, bins, sample_size),
+                                         allowDiskUse=True), None) or {}
+    report = {}
+    for name in ("pearson", "spearman", "x_summary", "y_summary"):
+        rows = document.get(name) or []
+        report[name] = rows[0] if rows else None
+    for name in ("x_histogram", "y_histogram", "sample"):
+        report[name] = document.get(name, [])
+    return report
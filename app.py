@@ -1,69 +1,189 @@
+import time
 import streamlit as st
-from config import MONGODB_URI, DB_NAME, DB_COLLECTION, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+from config import (DB_NAME, DB_COLLECTION, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, JSON_RENDER_MAX_ROWS, ARROW_PREVIEW_ROWS,
+                    DASHBOARD_WORKERS, ANALYTICS_BINS, ANALYTICS_SAMPLE_SIZE, CANONICAL_COLLECTION)
+from connections import get_films_collection, get_neo4j_driver, check_mongo, check_neo4j
 from mongodb_queries import QUERIES  
 from neo4j_queries import QUERIES as NEO4J_QUERIES  
-from pymongo import MongoClient
-from neo4j import GraphDatabase
+from data_version import get_data_version
+from query_runner import run_mongo_query, run_neo4j_query, run_cypher
+from cypher_prepare import CYPHER_PREPARER
+from overview import run_overview, measure_overview
+from federation import federate
+from analytics import ANALYTICS_FIELDS, correlation_report
+from graph_engine import LOCAL_QUERIES, get_snapshot, run_local_query
+from query_governor import (QueryGovernor, GovernedCollection, GOVERNOR_POOL, cancel, stop_reason,
+                            materialize_mongo_result)
+from query_cache import RESULT_CACHE, make_key
+from pagination import PAGINATED_TYPES, mongo_page, neo4j_page
+from dashboard import catalogue, run_all
+from mongo_arrow import ARROW_AVAILABLE, ARROW_TYPES, run_mongo_arrow, to_parquet_bytes
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd 
 
 # Sidebar selection for database mode
-database_mode = st.sidebar.radio("Select Database", ["MongoDB", "Neo4j"])
+database_mode = st.sidebar.radio("Select Database", ["MongoDB", "Neo4j", "Dashboard", "Analytics"])
 collection = None  
 
-# Function to execute MongoDB queries with optional parameters
-def execute_mongo_query(collection, query_name: str, limit: int = None, parameters: dict = None):
-    if query_name not in QUERIES:
-        raise ValueError(f"Unknown query: {query_name}")
-    
-    query_info = QUERIES[query_name]
-    query = query_info["query"]
+# Cancel button for a query that a previous run of the script left running
+cancel_slot = st.sidebar.empty()
+cancel_rendered = False
+running_query = st.session_state.get("running_query")
+if running_query:
+    cancel_rendered = True
+    if cancel_slot.button(f"Cancel running query ({running_query['label']})", key="cancel_query"):
+        killed = cancel(running_query["engine"], running_query["token"])
+        st.session_state.pop("running_query", None)
+        st.sidebar.warning(f"Stopped {running_query['label']}" if killed else f"{running_query['label']} had already finished")
 
-    # Replace placeholders in queries with provided parameters
-    if parameters:
-        for key, value in parameters.items():
-            query = query.replace(f"{{{key}}}", value)
+# Run a query under a QueryGovernor on the worker pool. Polling keeps the
+# script responsive, so clicking Cancel interrupts this run and the next run
+# kills the query on the server. Returns (result, governor); result is None
+# if the server stopped the query.
+def run_governed(engine: str, label: str, work):
+    global cancel_rendered
+    governor = QueryGovernor()
+    st.session_state["running_query"] = {"engine": engine, "token": governor.token, "label": label}
+    if not cancel_rendered:
+        cancel_rendered = True
+        cancel_slot.button(f"Cancel running query ({label})", key="cancel_query")
+
+    future = GOVERNOR_POOL.submit(work, governor)
+    status = st.empty()
+    started = time.perf_counter()
+    while not future.done():
+        status.info(f"Running {label}... {time.perf_counter() - started:.0f}s")
+        time.sleep(0.25)
+    status.empty()
+    st.session_state.pop("running_query", None)
 
     try:
-        if query_info["type"] == "aggregate":
-            result = list(collection.aggregate(query))
-        elif query_info["type"] == "count":
-            return collection.count_documents(query)
-        elif query_info["type"] == "find":
-            find_args = {"filter": query}
-            if "projection" in query_info:
-                find_args["projection"] = query_info["projection"]
-            if limit:
-                find_args["limit"] = limit
-            result = list(collection.find(**find_args))
-        else:
-            raise ValueError(f"Unsupported query type: {query_info['type']}")
+        result = future.result()
+    except Exception as e:
+        reason = stop_reason(e, governor)
+        if reason is None:
+            raise
+        st.error(f"Query stopped: {reason}")
+        return None, governor
+    if governor.truncated:
+        st.warning(f"Results truncated: {governor.truncated}")
+    return result, governor
+
+# Serve a predefined query from the result cache when the data has not changed.
+# run receives the QueryGovernor; truncated or stopped results are not cached.
+def cached_query(engine: str, query_name: str, parameters: dict, run):
+    key = make_key(engine, query_name, parameters, get_data_version())
+    hit = RESULT_CACHE.get(key)
+    if hit is not None:
+        result, age = hit
+        st.caption(f"Served from cache ({age:.0f}s old)")
+        return result
+    result, governor = run_governed(engine, query_name, run)
+    if result is not None and not governor.truncated:
+        RESULT_CACHE.put(key, result)
+    st.caption("Fresh result")
+    return result
 
+# Function to execute MongoDB queries with optional parameters
+def execute_mongo_query(collection, query_name: str, limit: int = None, parameters: dict = None):
+    parameters = parameters or {}
+    try:
+        result = cached_query("mongo", query_name, {"limit": limit, **parameters},
+                              lambda governor: run_mongo_query(collection, query_name, limit, parameters,
+                                                               governor=governor))
+        if result is None or isinstance(result, int):
+            return result
         return pd.DataFrame(result) if result else result
-    
+
     except Exception as e:
         st.error(f"Error executing {query_name}: {str(e)}")
         return None
 
+# Start browsing a query from its first page
+def start_pager(state_key: str, query_name: str, parameters: dict, page_size: int, federate_films: bool = False):
+    st.session_state[state_key] = {"query": query_name, "parameters": parameters, "page_size": page_size,
+                                   "federate_films": federate_films, "cursors": [None], "page": 0}
+
+# Show the current page of a paginated query with previous/next controls;
+# fetch_page(after, governor) runs under the query governor
+def show_pager(state_key: str, engine: str, fetch_page):
+    pager = st.session_state[state_key]
+    after = pager["cursors"][pager["page"]]
+    page = cached_query(engine, f"{pager['query']}:page",
+                        {**pager["parameters"], "after": after, "page_size": pager["page_size"],
+                         "federate_films": pager.get("federate_films", False)},
+                        lambda governor: fetch_page(after, governor))
+    if page is None:
+        return
+    rows, next_after = page
+    frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+    if not frame.empty:
+        st.dataframe(frame)
+    else:
+        st.warning("No results found.")
+
+    previous_col, page_col, next_col = st.columns(3)
+    page_col.caption(f"Page {pager['page'] + 1}")
+    if previous_col.button("Previous page", disabled=pager["page"] == 0, key=f"{state_key}_previous"):
+        pager["page"] -= 1
+        st.rerun()
+    if next_col.button("Next page", disabled=next_after is None, key=f"{state_key}_next"):
+        del pager["cursors"][pager["page"] + 1:]
+        pager["cursors"].append(next_after)
+        pager["page"] += 1
+        st.rerun()
+
+# Render a Neo4j result: the table, any paths as node/relationship tables and,
+# for small results only, the JSON view
+def show_neo4j_frames(frame: pd.DataFrame, paths: dict, empty_message: str, key: str):
+    if frame.empty:
+        st.warning(empty_message)
+        return
+    st.dataframe(frame)
+    if paths:
+        st.subheader("Path nodes")
+        st.dataframe(paths["nodes"])
+        st.subheader("Path relationships")
+        st.dataframe(paths["relationships"])
+    if len(frame) <= JSON_RENDER_MAX_ROWS and st.checkbox("Show as JSON", key=key):
+        st.json(frame.to_dict("records"))
+
+# Join film fields from MongoDB onto a Neo4j (frame, paths) result, batched by federation.py
+def join_films(data, governor, enabled: bool):
+    if not enabled:
+        return data
+    collection = get_films_collection()
+    return federate(*data, collection=GovernedCollection(collection, governor) if governor else collection)
+
+def join_films_page(page, governor, enabled: bool):
+    frame, next_after = page
+    return join_films((frame, None), governor, enabled)[0], next_after
+
+# Render a predefined MongoDB query result the way its type calls for
+def show_mongo_result(result, label: str):
+    if isinstance(result, int):
+        st.metric(label=label, value=result)
+    elif isinstance(result, list) and not result:
+        st.warning("No results found.")
+    elif isinstance(result, (list, pd.DataFrame)):
+        st.dataframe(pd.DataFrame(result))
+    else:
+        st.json(result)
+
 st.header("NoSQL Project - MongoDB and Neo4j Integration")
 
 # MongoDB section
 if database_mode == "MongoDB":
     st.sidebar.title("MongoDB")
-    mongodb_host = MONGODB_URI
-    mongodb_database = DB_NAME
-    mongodb_collection = DB_COLLECTION
 
-    # Connect to MongoDB
-    if mongodb_host and mongodb_database and mongodb_collection: 
-        try:
-            client = MongoClient(mongodb_host)
-            db = client[mongodb_database]
-            collection = db[mongodb_collection]
-            st.success(f"Connected to {mongodb_database}.{mongodb_collection}")
-        except Exception as e:
-            st.error(f"Failed to connect to MongoDB: {e}")
+    # Connect to MongoDB (the client is created once per server process)
+    healthy, error = check_mongo()
+    if healthy:
+        collection = get_films_collection()
+        st.success(f"Connected to {DB_NAME}.{DB_COLLECTION}")
+    else:
+        st.error(f"Failed to connect to MongoDB: {error}")
 
     st.header("Predefined MongoDB Queries")
     
@@ -73,29 +193,85 @@ if database_mode == "MongoDB":
     selected_query_label = st.selectbox("Choose a predefined query:", options=list(query_options.keys()))
     query_key = query_options[selected_query_label]
     query_info = QUERIES[query_key]
+    if query_info.get("collection") == CANONICAL_COLLECTION:
+        st.caption(f"Reads the {CANONICAL_COLLECTION} collection, which normalize.py must have filled first")
 
-    # Input fields for queries requiring parameters
+    # Input fields generated from the parameters the query declares
     query_parameters = {}
-    if query_key in ["films_by_director", "films_by_actor"]:
-        param_key = "director_name" if query_key == "films_by_director" else "actor_name"
-        query_parameters[param_key] = st.text_input(f"Enter {param_key.replace('_', ' ')}:")
+    for param_name, param_type in query_info.get("parameters", {}).items():
+        label = f"Enter {param_name.replace('_', ' ')}:"
+        if param_type is int:
+            query_parameters[param_name] = st.number_input(label, step=1, key=f"{query_key}_{param_name}")
+        elif param_type is float:
+            query_parameters[param_name] = st.number_input(label, key=f"{query_key}_{param_name}")
+        else:
+            query_parameters[param_name] = st.text_input(label, key=f"{query_key}_{param_name}")
+
+    # Large results can be decoded into Arrow columns and downloaded as Parquet
+    use_arrow = (ARROW_AVAILABLE and query_info["type"] in ARROW_TYPES
+                 and st.checkbox("Columnar (Arrow) result with Parquet download"))
+
+    # Row-returning queries are browsed one page at a time
+    paginate = (not use_arrow and query_info["type"] in PAGINATED_TYPES
+                and st.checkbox("Browse results page by page", value=True))
+    if paginate:
+        page_size = st.number_input("Rows per page", min_value=1, max_value=MAX_PAGE_SIZE, value=DEFAULT_PAGE_SIZE)
 
     # Limit parameter for 'find' queries
-    limit = st.number_input("Maximum results to show", min_value=1, max_value=1000, value=10) if query_info["type"] == "find" else None
+    limit = st.number_input("Maximum results to show", min_value=1, max_value=1000, value=10) if query_info["type"] == "find" and not paginate and not use_arrow else None
 
     # Button to execute the query
     if st.button(f"Execute: {selected_query_label.split(' (')[0]}"):
         if collection is None:
             st.error("No MongoDB connection established")
+        elif paginate:
+            start_pager("mongo_pager", query_key, query_parameters, page_size)
+        elif use_arrow:
+            try:
+                table = cached_query("mongo", f"{query_key}:arrow", query_parameters,
+                                     lambda governor: run_mongo_arrow(collection, query_key,
+                                                                      parameters=query_parameters, governor=governor))
+                if table is not None:
+                    st.caption(f"{table.num_rows} rows, showing the first {min(table.num_rows, ARROW_PREVIEW_ROWS)}")
+                    st.dataframe(table.slice(0, ARROW_PREVIEW_ROWS).to_pandas())
+                    st.download_button("Download as Parquet", data=to_parquet_bytes(table),
+                                       file_name=f"{query_key}.parquet", mime="application/octet-stream")
+            except Exception as e:
+                st.error(f"Error executing {query_key}: {str(e)}")
         else:
             result = execute_mongo_query(collection, query_key, limit, query_parameters)
             if result is not None:
-                if isinstance(result, pd.DataFrame):
-                    st.dataframe(result)
-                elif isinstance(result, int):
-                    st.metric(label=query_info["description"], value=result)
-                else:
-                    st.json(result)
+                show_mongo_result(result, query_info["description"])
+
+    pager = st.session_state.get("mongo_pager")
+    if paginate and collection is not None and pager and pager["query"] == query_key:
+        try:
+            show_pager("mongo_pager", "mongo",
+                       lambda after, governor: mongo_page(collection, query_key, after, pager["page_size"],
+                                                          pager["parameters"], governor))
+        except Exception as e:
+            st.error(f"Error executing {query_key}: {str(e)}")
+
+    # Every compatible summary query in one $facet aggregation, one scan per collection
+    st.header("Overview")
+    compare = st.checkbox("Measure the time saved against running the queries one by one")
+    if st.button("Run overview"):
+        if collection is None:
+            st.error("No MongoDB connection established")
+        else:
+            try:
+                results = cached_query("mongo", "overview", {}, lambda governor: run_overview(collection, governor))
+                for name, result in (results or {}).items():
+                    st.subheader(QUERIES[name]["description"])
+                    show_mongo_result(result, name)
+                if compare:
+                    report = measure_overview(collection)
+                    st.info(f"Overview {report['combined_ms']:.0f} ms ({report['combined_docs']} docs examined) vs "
+                            f"one by one {report['individual_ms']:.0f} ms ({report['individual_docs']} docs examined): "
+                            f"{report['saved_ms']:.0f} ms saved")
+                    st.dataframe(pd.DataFrame(report["queries"]).T)
+            except Exception as e:
+                st.error(f"Error running overview: {e}")
 
     # Custom query input
     st.header("Custom MongoDB Query")
@@ -109,13 +285,14 @@ if database_mode == "MongoDB":
         else:
             try:
                 safe_globals = {"__builtins__": {}}
-                safe_locals = {"collection": collection}
-                result = eval(mongo_input, safe_globals, safe_locals)
+                result, _ = run_governed("mongo", "custom query", lambda governor: materialize_mongo_result(
+                    eval(mongo_input, safe_globals, {"collection": GovernedCollection(collection, governor)}),
+                    governor))
                 
                 if isinstance(result, list) and result:
                     df = pd.DataFrame(result)
                     st.dataframe(df)
-                else:
+                elif result is not None:
                     st.write(result)
             except Exception as e:
                 st.error(f"Error executing command: {e}")
@@ -123,18 +300,22 @@ if database_mode == "MongoDB":
 # Neo4j section
 elif database_mode == "Neo4j":
     st.sidebar.title("Neo4j")  
-    neo4j_host = NEO4J_URI
-    neo4j_username = NEO4J_USERNAME
-    neo4j_password = NEO4J_PASSWORD 
 
-    # Connect to Neo4j
-    if neo4j_host and neo4j_username and neo4j_password:
-        try:
-            driver = GraphDatabase.driver(neo4j_host, auth=(neo4j_username, neo4j_password))
-            st.success("Connected to Neo4j")
-        except Exception as e:
-            st.error(f"Failed to connect to Neo4j: {e}")  
-            driver = None  
+    # Connect to Neo4j (the driver is created once per server process)
+    healthy, error = check_neo4j()
+    if healthy:
+        driver = get_neo4j_driver()
+        st.success("Connected to Neo4j")
+    else:
+        st.error(f"Failed to connect to Neo4j: {error}")
+        driver = None
+
+    # Literals are sent as parameters, so repeated query shapes can reuse the
+    # server's plans; this counts the repeats seen by this process only
+    shape_stats = CYPHER_PREPARER.stats()
+    if shape_stats["lookups"]:
+        st.sidebar.caption(f"Query shape reuse: {shape_stats['shape_reuse_rate']:.0%} of {shape_stats['lookups']} queries "
+                           f"({shape_stats['shapes']} distinct shapes, counted in this app)")
 
     st.header("Predefined Neo4j Queries")
     
@@ -153,31 +334,56 @@ elif database_mode == "Neo4j":
         query_parameters["actor_name1"] = st.text_input("Enter first actor name:")
         query_parameters["actor_name2"] = st.text_input("Enter second actor name:")
 
+    # Path and neighbourhood queries can be answered from the in-process CSR snapshot
+    local = (query_key in LOCAL_QUERIES and get_snapshot() is not None
+             and st.checkbox("Answer in-process from the graph snapshot"))
+
+    # Row-returning queries are browsed one page at a time
+    paginate = (not local and query_neo4j_info.get("paginate", True)
+                and st.checkbox("Browse results page by page", value=True))
+
+    # Film references in any result can be completed with the MongoDB documents
+    federate_films = st.checkbox("Join film details from MongoDB (rating, revenue, runtime, ...)")
+    if paginate:
+        page_size = st.number_input("Rows per page", min_value=1, max_value=MAX_PAGE_SIZE, value=DEFAULT_PAGE_SIZE)
+
     # Button to execute the query
     if st.button(f"Execute: {selected_query_label.split(' (')[0]}"):
-        if driver is None:
+        if local:
+            try:
+                started = time.perf_counter()
+                frame, _ = join_films((run_local_query(query_key, query_parameters), None), None, federate_films)
+                st.caption(f"Answered in-process in {(time.perf_counter() - started) * 1000:.1f} ms")
+                if not get_snapshot().is_current():
+                    st.warning("The data changed since the graph snapshot was built")
+                show_neo4j_frames(frame, {}, "No results found.", "local_json")
+            except Exception as e:
+                st.error(f"Error executing query: {str(e)}")
+        elif driver is None:
             st.error("No Neo4j connection established")
+        elif paginate:
+            start_pager("neo4j_pager", query_key, query_parameters, page_size, federate_films)
         else:
             try:
-                with driver.session() as session:
-                    if query_key == "recommended_films_based_on_actor":
-                        result = session.run(query_neo4j_info["query"], actorName= query_parameters["actor_name"])
-                    elif query_key == "shortest_path_between_actors":
-                        result = session.run(query_neo4j_info["query"], actorName1=query_parameters["actor_name1"],
-                                            actorName2=query_parameters["actor_name2"])
-                    else:
-                        result = session.run(query_neo4j_info["query"])
-
-                    data = [record.data() for record in result]
-                    if data:
-                        st.json(data)
-                        df = pd.DataFrame(data)
-                        st.dataframe(df)
-                    else:
-                        st.warning("No results found.")
+                data = cached_query("neo4j", f"{query_key}:films" if federate_films else query_key, query_parameters,
+                                    lambda governor: join_films(run_neo4j_query(query_key, query_parameters, governor=governor),
+                                                                governor, federate_films))
+                if data is not None:
+                    frame, paths = data
+                    show_neo4j_frames(frame, paths, "No results found.", "predefined_json")
             except Exception as e:
                 st.error(f"Error executing query: {str(e)}")
 
+    pager = st.session_state.get("neo4j_pager")
+    if paginate and driver is not None and pager and pager["query"] == query_key:
+        try:
+            show_pager("neo4j_pager", "neo4j",
+                       lambda after, governor: join_films_page(neo4j_page(query_key, pager["parameters"], after,
+                                                                          pager["page_size"], governor),
+                                                               governor, pager.get("federate_films", False)))
+        except Exception as e:
+            st.error(f"Error executing query: {str(e)}")
+
     # Custom Cypher query input
     st.markdown("Enter a Neo4j query in Cypher format")
     neo4j_input = st.text_area("Cypher Query", height=100)
@@ -189,14 +395,104 @@ elif database_mode == "Neo4j":
             st.warning("Please enter a Cypher query.")  
         else:
             try:
-                with driver.session() as session:
-                    result = session.run(neo4j_input)
-                    data = [record.data() for record in result]
-
-                    if data:
-                        df = pd.DataFrame(data)
-                        st.dataframe(df)
-                    else:
-                        st.info("Query returned no results.")
+                data, _ = run_governed("neo4j", "custom Cypher",
+                                       lambda governor: join_films(run_cypher(neo4j_input, governor), governor, federate_films))
+                if data is not None:
+                    frame, paths = data
+                    show_neo4j_frames(frame, paths, "Query returned no results.", "custom_json")
             except Exception as e:
                 st.error(f"Error executing Cypher query: {e}")  
+
+# Dashboard section: every predefined query of both databases at once
+elif database_mode == "Dashboard":
+    st.sidebar.title("Dashboard")
+    st.header("Run All Predefined Queries")
+    workers = st.sidebar.number_input("Concurrent queries", min_value=1, max_value=32, value=DASHBOARD_WORKERS)
+
+    if st.button("Run all"):
+        mongo_healthy, mongo_error = check_mongo()
+        neo4j_healthy, neo4j_error = check_neo4j()
+        if not mongo_healthy:
+            st.error(f"Failed to connect to MongoDB: {mongo_error}")
+        if not neo4j_healthy:
+            st.error(f"Failed to connect to Neo4j: {neo4j_error}")
+
+        entries = [(engine, name) for engine, name in catalogue()
+                   if (engine == "MongoDB" and mongo_healthy) or (engine == "Neo4j" and neo4j_healthy)]
+        collection = get_films_collection() if mongo_healthy else None
+        # One placeholder per query, in catalogue order, filled as results arrive
+        slots = {entry: st.empty() for entry in entries}
+        for engine, name in entries:
+            slots[(engine, name)].info(f"{engine} · {name}: running...")
+
+        started = time.perf_counter()
+        total_query_time = 0.0
+        for engine, name, result, error, seconds in run_all(collection, entries, workers):
+            total_query_time += seconds
+            with slots[(engine, name)].container():
+                st.subheader(f"{engine} · {name}")
+                st.caption(f"{seconds * 1000:.0f} ms")
+                if error:
+                    st.error(error)
+                elif isinstance(result, int):
+                    st.metric(label=name, value=result)
+                elif isinstance(result, tuple):
+                    st.dataframe(result[0])
+                elif result:
+                    st.dataframe(pd.DataFrame(result))
+                else:
+                    st.warning("No results found.")
+        st.success(f"Ran {len(entries)} queries in {time.perf_counter() - started:.2f}s "
+                   f"(sum of query times {total_query_time:.2f}s)")
+
+# Analytics section: correlation statistics computed inside MongoDB
+elif database_mode == "Analytics":
+    st.sidebar.title("Analytics")
+    st.header("Correlation Analysis")
+
+    x_field = st.selectbox("X field", ANALYTICS_FIELDS, index=0)
+    y_field = st.selectbox("Y field", ANALYTICS_FIELDS, index=1)
+    bins = st.sidebar.number_input("Histogram buckets", min_value=2, max_value=100, value=ANALYTICS_BINS)
+    sample_size = st.sidebar.number_input("Scatter sample size", min_value=10, max_value=5000, value=ANALYTICS_SAMPLE_SIZE)
+
+    if st.button("Analyse"):
+        healthy, error = check_mongo()
+        if not healthy:
+            st.error(f"Failed to connect to MongoDB: {error}")
+        else:
+            try:
+                report = cached_query("mongo", "correlation_report",
+                                      {"x": x_field, "y": y_field, "bins": bins, "sample": sample_size},
+                                      lambda governor: correlation_report(GovernedCollection(get_films_collection(), governor),
+                                                                          x_field, y_field, bins, sample_size))
+            except Exception as e:
+                st.error(f"Error running analysis: {e}")
+                report = None
+
+            if report and report["pearson"]:
+                pearson_col, spearman_col, n_col = st.columns(3)
+                pearson_col.metric("Pearson r", f"{report['pearson']['r']:.3f}" if report["pearson"]["r"] is not None else "n/a")
+                spearman_col.metric("Spearman ρ", f"{report['spearman']['r']:.3f}" if report["spearman"]["r"] is not None else "n/a")
+                n_col.metric("Films", report["pearson"]["n"])
+                st.dataframe(pd.DataFrame([report["x_summary"], report["y_summary"]], index=[x_field, y_field]))
+
+                # Histograms from the $bucketAuto boundaries, drawn as bars of their real width
+                fig, axes = plt.subplots(1, 2, figsize=(12, 4))
+                for ax, field, buckets in zip(axes, (x_field, y_field), (report["x_histogram"], report["y_histogram"])):
+                    lefts = [bucket["_id"]["min"] for bucket in buckets]
+                    widths = [bucket["_id"]["max"] - bucket["_id"]["min"] for bucket in buckets]
+                    ax.bar(lefts, [bucket["count"] for bucket in buckets], width=widths, align="edge", edgecolor="white")
+                    ax.set_title(field)
+                    ax.set_ylabel("Films")
+                st.pyplot(fig)
+
+                sample = pd.DataFrame(report["sample"])
+                if not sample.empty:
+                    fig, ax = plt.subplots(figsize=(8, 5))
+                    sns.regplot(data=sample, x="x", y="y", ax=ax, scatter_kws={"alpha": 0.5})
+                    ax.set_xlabel(x_field)
+                    ax.set_ylabel(y_field)
+                    ax.set_title(f"Random sample of {len(sample)} films")
+                    st.pyplot(fig)
+            elif report is not None:
+                st.warning("No films have both values.")
@@ -0,0 +1,174 @@
+# benchmark.py
+# Runs every catalogued MongoDB and Neo4j query against the configured servers,
+# records cold and warm latency percentiles, rows returned and server-side work
+# (documents/keys examined, db hits), writes the run as JSON and flags
+# regressions against a previous run.
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pymongo.errors import PyMongoError
+from neo4j.exceptions import Neo4jError, DriverError
+from config import BENCHMARK_RUNS, BENCHMARK_REGRESSION_THRESHOLD, BENCHMARK_OUTPUT_DIR
+from connections import get_films_collection, neo4j_session, close_connections
+from mongodb_queries import QUERIES, TEMPLATES
+from neo4j_queries import QUERIES as NEO4J_QUERIES
+from query_runner import run_mongo_query, query_collection, neo4j_parameters, EXAMPLE_PARAMETERS
+from cypher_prepare import prepare_cypher, run_prepared
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def latency_stats(samples):
+    return {
+        "p50_ms": percentile(samples, 50),
+        "p90_ms": percentile(samples, 90),
+        "p99_ms": percentile(samples, 99),
+        "mean_ms": sum(samples) / len(samples)
+    }
+
+def timed(run):
+    started = time.perf_counter()
+    result = run()
+    return (time.perf_counter() - started) * 1000, result
+
+def row_count(result):
+    return result if isinstance(result, int) else len(result)
+
+def find_totals(document, keys):
+    # Sum the execution counters wherever the explain output nests them
+    totals = dict.fromkeys(keys, 0)
+    if isinstance(document, dict):
+        for key, value in document.items():
+            if key in totals and isinstance(value, int):
+                totals[key] += value
+            else:
+                for inner_key, inner_value in find_totals(value, keys).items():
+                    totals[inner_key] += inner_value
+    elif isinstance(document, list):
+        for value in document:
+            for inner_key, inner_value in find_totals(value, keys).items():
+                totals[inner_key] += inner_value
+    return totals
+
+def mongo_server_metrics(collection, query_info):
+    collection = query_collection(collection, query_info)
+    query = query_info["query"]
+    command = {
+        "aggregate": {"aggregate": collection.name, "pipeline": query, "cursor": {}},
+        "count": {"count": collection.name, "query": query},
+        "distinct": {"distinct": collection.name, "key": query_info.get("field"), "query": query},
+        "find": {"find": collection.name, "filter": query, "projection": query_info.get("projection", {})}
+    }[query_info["type"]]
+    explain = collection.database.command("explain", command, verbosity="executionStats")
+    totals = find_totals(explain, ["totalDocsExamined", "totalKeysExamined"])
+    return {"docs_examined": totals["totalDocsExamined"], "keys_examined": totals["totalKeysExamined"]}
+
+def benchmark_mongo(runs, use_summaries):
+    collection = get_films_collection()
+    results = {}
+    for name, query_info in QUERIES.items():
+        try:
+            # Parameterized entries run and are explained with their example values
+            query_info = {**query_info, "query": TEMPLATES[name].bind(EXAMPLE_PARAMETERS.get(name))}
+            # Cold: the plan cache is cleared before the first execution
+            target = query_collection(collection, query_info)
+            target.database.command("planCacheClear", target.name)
+            run = lambda: run_mongo_query(collection, name, parameters=EXAMPLE_PARAMETERS.get(name),
+                                          use_summaries=use_summaries)
+            cold_ms, result = timed(run)
+            warm = [timed(run)[0] for _ in range(runs)]
+            results[name] = {
+                "cold_ms": cold_ms,
+                "warm": latency_stats(warm),
+                "rows": row_count(result),
+                "server": mongo_server_metrics(collection, query_info)
+            }
+        except (PyMongoError, ValueError) as e:
+            results[name] = {"error": str(e)}
+        print(f"mongodb/{name}: {results[name].get('warm', results[name])}")
+    return results
+
+def total_db_hits(profile):
+    return profile.get("dbHits", 0) + sum(total_db_hits(child) for child in profile.get("children", []))
+
+def benchmark_neo4j(runs):
+    # Queries go through the same prepared (parameterized) path as the app,
+    # each in its own session so a dropped connection only fails that query
+    results = {}
+    for name, query_info in NEO4J_QUERIES.items():
+        if "query" not in query_info:
+            continue
+        parameters = neo4j_parameters(name, EXAMPLE_PARAMETERS.get(name))
+        try:
+            with neo4j_session() as session:
+                run = lambda: list(run_prepared(session, query_info["query"], parameters))
+                # Cold: the query caches are dropped before the first execution
+                session.run("CALL db.clearQueryCaches()").consume()
+                cold_ms, result = timed(run)
+                warm = [timed(run)[0] for _ in range(runs)]
+                shape, prepared_parameters = prepare_cypher(query_info["query"], parameters)
+                profile = session.run(f"PROFILE {shape}", prepared_parameters).consume().profile
+            results[name] = {
+                "cold_ms": cold_ms,
+                "warm": latency_stats(warm),
+                "rows": len(result),
+                "server": {"db_hits": total_db_hits(profile or {})}
+            }
+        except Neo4jError as e:
+            results[name] = {"error": e.message}
+        except DriverError as e:
+            # ServiceUnavailable, SessionExpired, ...: the suite moves on
+            results[name] = {"error": str(e)}
+        print(f"neo4j/{name}: {results[name].get('warm', results[name])}")
+    return results
+
+def compare(current, baseline, threshold):
+    # A query regresses when its warm median grows by more than the threshold
+    regressions = []
+    for engine, queries in current["results"].items():
+        for name, stats in queries.items():
+            previous = baseline.get("results", {}).get(engine, {}).get(name)
+            if not previous or "warm" not in previous or "warm" not in stats:
+                continue
+            before, after = previous["warm"]["p50_ms"], stats["warm"]["p50_ms"]
+            if before > 0 and (after - before) / before > threshold:
+                regressions.append(f"{engine}/{name}: p50 {before:.1f}ms -> {after:.1f}ms (+{(after - before) / before:.0%})")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every catalogued query")
+    parser.add_argument("--runs", type=int, default=BENCHMARK_RUNS, help="warm executions per query")
+    parser.add_argument("--store", choices=["mongodb", "neo4j", "both"], default="both")
+    parser.add_argument("--summaries", action="store_true", help="let MongoDB queries read fresh summary collections")
+    parser.add_argument("--output", help="JSON file for this run (default: a timestamped file in benchmarks/)")
+    parser.add_argument("--baseline", help="previous JSON run to compare against")
+    parser.add_argument("--threshold", type=float, default=BENCHMARK_REGRESSION_THRESHOLD,
+                        help="relative p50 slowdown reported as a regression")
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    run = {"started_at": started.isoformat(), "runs": args.runs, "results": {}}
+    if args.store in ("mongodb", "both"):
+        run["results"]["mongodb"] = benchmark_mongo(args.runs, args.summaries)
+    if args.store in ("neo4j", "both"):
+        run["results"]["neo4j"] = benchmark_neo4j(args.runs)
+    close_connections()
+
+    output = args.output or os.path.join(BENCHMARK_OUTPUT_DIR, f"benchmark-{started:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(run, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,145 @@
+# communities.py
+# Community detection without the GDS plugin. The weighted CO_STARRED edges
+# (a compact projection of the ACTED_IN graph, see neo4j_data.py) are read
+# into memory, label propagation runs locally and every actor gets a
+# `community` property: the name of the best connected actor of its community.
+# Labels never cross connected components, so after a sync only the
+# components around the changed actors are read and recomputed. The rebuild
+# runs it on the staging labels, before the graph is swapped in.
+import argparse
+import random
+from collections import defaultdict
+from tqdm import tqdm
+from neo4j.exceptions import Neo4jError
+from connections import neo4j_session, close_connections
+from graph_labels import LIVE_LABELS, with_labels
+from materialize import bump_data_version_keeping_summaries
+
+# Actors whose community is written per Neo4j transaction
+COMMUNITY_BATCH_SIZE = 1000
+# Label propagation stops earlier once a full pass changes no label
+MAX_ITERATIONS = 20
+SEED = 42
+
+ALL_EDGES_QUERY = """
+    MATCH (a:Actor)-[r:CO_STARRED]->(b:Actor)
+    RETURN a.name AS source, b.name AS target, r.films AS weight
+"""
+
+NEIGHBOUR_EDGES_QUERY = """
+    UNWIND $names AS name
+    MATCH (a:Actor {name: name})-[r:CO_STARRED]-(b:Actor)
+    RETURN a.name AS source, b.name AS target, r.films AS weight
+"""
+
+WRITE_COMMUNITIES_QUERY = """
+    UNWIND $rows AS row
+    MATCH (a:Actor {name: row.name})
+    SET a.community = row.community
+"""
+
+def add_edge(graph, source, target, weight):
+    graph[source][target] = weight
+    graph[target][source] = weight
+
+def load_graph(session, labels=LIVE_LABELS):
+    graph = defaultdict(dict)
+    for record in session.run(with_labels("MATCH (a:Actor) RETURN a.name AS name", labels)):
+        graph[record["name"]]
+    for record in session.run(with_labels(ALL_EDGES_QUERY, labels)):
+        add_edge(graph, record["source"], record["target"], record["weight"])
+    return graph
+
+def load_components(session, seeds, labels=LIVE_LABELS):
+    # Breadth-first over CO_STARRED, one query per frontier, until the
+    # components containing the seed actors are complete
+    graph = defaultdict(dict)
+    frontier = set(seeds)
+    for name in frontier:
+        graph[name]
+    while frontier:
+        records = list(session.run(with_labels(NEIGHBOUR_EDGES_QUERY, labels), names=sorted(frontier)))
+        frontier = {record["target"] for record in records if record["target"] not in graph}
+        for record in records:
+            add_edge(graph, record["source"], record["target"], record["weight"])
+    return graph
+
+def label_propagation(graph, max_iterations=MAX_ITERATIONS, seed=SEED):
+    # Asynchronous label propagation: every actor takes the label with the
+    # highest total shared-film weight among its co-stars, keeping its own on a tie
+    labels = {name: name for name in graph}
+    order = sorted(graph)
+    rng = random.Random(seed)
+    for _ in range(max_iterations):
+        rng.shuffle(order)
+        changed = 0
+        for name in order:
+            if not graph[name]:
+                continue
+            weights = defaultdict(int)
+            for neighbour, weight in graph[name].items():
+                weights[labels[neighbour]] += weight
+            best = max(weights.values())
+            if weights.get(labels[name]) != best:
+                labels[name] = min(label for label, weight in weights.items() if weight == best)
+                changed += 1
+        if not changed:
+            break
+    return labels
+
+def name_communities(graph, labels):
+    # Name each community after its member with the highest weighted degree
+    members = defaultdict(list)
+    for name, label in labels.items():
+        members[label].append(name)
+    communities = {}
+    for names in members.values():
+        leader = min(names, key=lambda name: (-sum(graph[name].values()), name))
+        communities.update(dict.fromkeys(names, leader))
+    return communities
+
+def write_communities(session, communities, batch_size=COMMUNITY_BATCH_SIZE, labels=LIVE_LABELS):
+    query = with_labels(WRITE_COMMUNITIES_QUERY, labels)
+    rows = [{"name": name, "community": community} for name, community in communities.items()]
+    with tqdm(total=len(rows), desc="Writing communities", unit="actors") as progress:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            session.execute_write(lambda tx: tx.run(query, rows=batch).consume())
+            progress.update(len(batch))
+
+def communities_exist(session, labels=LIVE_LABELS):
+    return session.run(with_labels("MATCH (a:Actor) WHERE a.community IS NOT NULL RETURN a LIMIT 1",
+                                   labels)).single() is not None
+
+def detect_communities(seeds=None, batch_size=COMMUNITY_BATCH_SIZE, labels=LIVE_LABELS):
+    # Whole graph when seeds is None, otherwise only the components of the
+    # seed actors. Incremental runs are skipped until a full run has written
+    # communities. Returns the number of actors written, or None on failure.
+    try:
+        with neo4j_session() as session:
+            if seeds is not None:
+                if not seeds or not communities_exist(session, labels):
+                    return 0
+                graph = load_components(session, seeds, labels)
+            else:
+                graph = load_graph(session, labels)
+            communities = name_communities(graph, label_propagation(graph))
+            write_communities(session, communities, batch_size, labels)
+        print(f"Communities updated for {len(communities)} actors ({len(set(communities.values()))} communities).")
+        return len(communities)
+    except Neo4jError as e:
+        print(f"Error detecting communities: {e}")
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect actor communities by label propagation over CO_STARRED")
+    parser.add_argument("--actors", nargs="+",
+                        help="only recompute the components containing these actors")
+    parser.add_argument("--batch-size", type=int, default=COMMUNITY_BATCH_SIZE,
+                        help="actors written per Neo4j transaction")
+    args = parser.parse_args()
+
+    # Cached community results are keyed on the data version
+    if detect_communities(args.actors, args.batch_size) is not None:
+        bump_data_version_keeping_summaries("communities")
+    close_connections()
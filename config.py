@@ -3,4 +3,71 @@ DB_NAME = "entertainment"
 MONGODB_URI = "mongodb://localhost:27017/"
 NEO4J_URI= "bolt://54.209.65.220"
 NEO4J_USERNAME = "neo4j"
-NEO4J_PASSWORD = "nozzle-adhesives-jugs"
\ No newline at end of file
+NEO4J_PASSWORD = "nozzle-adhesives-jugs"
+
+# Checkpoint written by neo4j_data.py --sync
+SYNC_STATE_FILE = "sync_state.json"
+
+# Connection pool settings shared by app.py and the importer (see connections.py)
+MONGO_MAX_POOL_SIZE = 50
+MONGO_SERVER_SELECTION_TIMEOUT_MS = 5000
+MONGO_CONNECT_TIMEOUT_MS = 5000
+NEO4J_MAX_POOL_SIZE = 50
+NEO4J_CONNECTION_TIMEOUT = 15
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = 30
+NEO4J_FETCH_SIZE = 1000
+# Seconds a health check result is reused before the servers are pinged again
+HEALTH_CHECK_INTERVAL = 30
+
+# Result cache for the predefined queries in app.py (see query_cache.py)
+RESULT_CACHE_TTL = 600
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Collection holding the data-version stamp bumped after every import or sync
+META_COLLECTION = "meta"
+
+# Materialized summaries of the heavy aggregations (see materialize.py)
+SUMMARY_COLLECTION_PREFIX = "summary_"
+SUMMARY_MEMBERSHIP_COLLECTION = "summary_membership"
+
+# Films rewritten into one typed schema with real arrays (see normalize.py)
+CANONICAL_COLLECTION = "films_canonical"
+
+# Benchmark suite defaults (see benchmark.py)
+BENCHMARK_RUNS = 10
+BENCHMARK_REGRESSION_THRESHOLD = 0.2
+BENCHMARK_OUTPUT_DIR = "benchmarks"
+
+# Database filled by generate_data.py; point DB_NAME at it to import or
+# benchmark against a synthetic catalogue
+SYNTHETIC_DB_NAME = "entertainment_synthetic"
+
+# Keyset pagination of predefined query results (see pagination.py)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Results up to this many rows can also be shown as JSON in app.py
+JSON_RENDER_MAX_ROWS = 200
+
+# Rows of an Arrow result previewed in app.py; the Parquet download has them all
+ARROW_PREVIEW_ROWS = 1000
+
+# Queries run at the same time by the "Run all" dashboard
+DASHBOARD_WORKERS = 8
+
+# Limits applied by query_governor.py to predefined and custom queries
+QUERY_MAX_TIME_MS = 30000
+QUERY_MAX_ROWS = 10000
+QUERY_MAX_BYTES = 64 * 1024 * 1024
+
+# In-process CSR graph snapshot written and memory-mapped by graph_engine.py
+GRAPH_SNAPSHOT_DIR = "graph_snapshot"
+
+# Prepared Cypher shapes remembered by cypher_prepare.py
+CYPHER_SHAPE_CACHE_SIZE = 512
+
+# Server-side analytics (see analytics.py): histogram buckets and the
+# number of points sampled for scatter plots
+ANALYTICS_BINS = 20
+ANALYTICS_SAMPLE_SIZE = 500
+
+# Film ids per $in query when Neo4j results are joined with MongoDB (see federation.py)
+FEDERATION_BATCH_SIZE = 1000
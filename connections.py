@@ -0,0 +1,92 @@
+# connections.py
+# One MongoClient and one Neo4j driver per process, created on first use.
+# Both are thread-safe and pool their connections, so every caller shares them.
+import atexit
+import time
+from threading import Lock
+import pymongo
+from neo4j import GraphDatabase
+from neo4j.exceptions import Neo4jError, ServiceUnavailable
+from pymongo.errors import PyMongoError
+from config import (MONGODB_URI, DB_NAME, DB_COLLECTION, CANONICAL_COLLECTION, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD,
+                    MONGO_MAX_POOL_SIZE, MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS,
+                    NEO4J_MAX_POOL_SIZE, NEO4J_CONNECTION_TIMEOUT, NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+                    NEO4J_FETCH_SIZE, HEALTH_CHECK_INTERVAL)
+
+_lock = Lock()
+_mongo_client = None
+_neo4j_driver = None
+_health = {}
+
+def get_mongo_client():
+    global _mongo_client
+    if _mongo_client is None:
+        with _lock:
+            if _mongo_client is None:
+                _mongo_client = pymongo.MongoClient(
+                    MONGODB_URI,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS
+                )
+    return _mongo_client
+
+def get_database():
+    return get_mongo_client()[DB_NAME]
+
+def get_films_collection():
+    return get_database()[DB_COLLECTION]
+
+def get_canonical_collection():
+    return get_database()[CANONICAL_COLLECTION]
+
+def get_neo4j_driver():
+    global _neo4j_driver
+    if _neo4j_driver is None:
+        with _lock:
+            if _neo4j_driver is None:
+                _neo4j_driver = GraphDatabase.driver(
+                    NEO4J_URI,
+                    auth=(NEO4J_USERNAME, NEO4J_PASSWORD),
+                    max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+                    connection_timeout=NEO4J_CONNECTION_TIMEOUT,
+                    connection_acquisition_timeout=NEO4J_CONNECTION_ACQUISITION_TIMEOUT
+                )
+    return _neo4j_driver
+
+def neo4j_session(**kwargs):
+    kwargs.setdefault("fetch_size", NEO4J_FETCH_SIZE)
+    return get_neo4j_driver().session(**kwargs)
+
+def _cached_check(name, check):
+    # Reuse a recent result so a Streamlit rerun does not ping the server every time
+    now = time.monotonic()
+    cached = _health.get(name)
+    if cached and now - cached[0] < HEALTH_CHECK_INTERVAL and cached[1]:
+        return cached[1], cached[2]
+    try:
+        check()
+        result = (True, None)
+    except (PyMongoError, Neo4jError, ServiceUnavailable, OSError) as e:
+        result = (False, str(e))
+    _health[name] = (now, *result)
+    return result
+
+def check_mongo():
+    return _cached_check("mongo", lambda: get_mongo_client().admin.command("ping"))
+
+def check_neo4j():
+    return _cached_check("neo4j", lambda: get_neo4j_driver().verify_connectivity())
+
+def close_connections():
+    global _mongo_client, _neo4j_driver
+    with _lock:
+        if _mongo_client is not None:
+            _mongo_client.close()
+            _mongo_client = None
+        if _neo4j_driver is not None:
+            _neo4j_driver.close()
+            _neo4j_driver = None
+        _health.clear()
+
+atexit.register(close_connections)
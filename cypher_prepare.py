@@ -0,0 +1,171 @@
+# cypher_prepare.py
+# Turns Cypher text into a parameterized "shape": string and number literals
+# become $lit<n> parameters, comments are dropped and whitespace is collapsed.
+# Queries that differ only in their values then send the same text, so Neo4j
+# reuses the cached plan instead of planning each variant again. Prepared
+# shapes are kept in an LRU cache and their reuse is counted. Literals that
+# Cypher requires to stay literal are left in place, and a shape the server
+# still cannot parse is dropped in favour of the raw text.
+import re
+from collections import OrderedDict
+from threading import Lock
+from neo4j.exceptions import Neo4jError
+from config import CYPHER_SHAPE_CACHE_SIZE
+
+TOKEN = re.compile(r"""
+      (?P<comment>//[^\n]*|/\*.*?\*/)
+    | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    | (?P<quoted>`[^`]*`)
+    | (?P<parameter>\$\w+)
+    | (?P<word>[A-Za-z_]\w*)
+    | (?P<number>(?:\d+(?:\.\d+)?|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<space>\s+)
+    | (?P<range>\.\.)
+    | (?P<symbol>.)
+""", re.VERBOSE | re.DOTALL)
+
+ESCAPES = {"\\": "\\", "'": "'", '"': '"', "n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+# Schema and admin commands do not accept parameters everywhere
+UNPREPARED = re.compile(r"^\s*(?:(?:CREATE|DROP)\s+(?:OR\s+REPLACE\s+)?(?:CONSTRAINT|INDEX|RANGE|TEXT|POINT|FULLTEXT|LOOKUP|VECTOR|DATABASE|ALIAS|USER|ROLE)|SHOW|GRANT|DENY|REVOKE|ALTER|START|STOP)\b",
+                        re.IGNORECASE)
+
+# Quantifiers of path patterns: {n}, {n,}, {,m}, {n,m}
+QUANTIFIER = re.compile(r"\{\s*\d*\s*(?:,\s*\d*\s*)?\}")
+# Keywords whose following number or string must stay literal
+LITERAL_AFTER = {"SHORTEST", "ANY", "CONCURRENT", "FIELDTERMINATOR"}
+
+SYNTAX_ERROR = "Neo.ClientError.Statement.SyntaxError"
+
+def unescape(literal):
+    body = literal[1:-1]
+    return re.sub(r"\\(u[0-9a-fA-F]{4}|.)",
+                  lambda m: chr(int(m.group(1)[1:], 16)) if len(m.group(1)) == 5 else ESCAPES.get(m.group(1), m.group(1)),
+                  body)
+
+def number_value(text):
+    return int(text) if re.fullmatch(r"\d+", text) else float(text)
+
+def parameterize(text):
+    # Returns (shape, values): the normalized text and the extracted literals
+    # in order, named lit0, lit1, ...
+    parts = []
+    values = []
+    brackets = []
+    previous = ""
+    tokens = list(TOKEN.finditer(text))
+    for i, token in enumerate(tokens):
+        kind, value = token.lastgroup, token.group()
+        if kind == "comment":
+            continue
+        if kind == "space":
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+            continue
+
+        keep = False
+        if kind == "number":
+            following = next((t.group() for t in tokens[i + 1:] if t.lastgroup not in ("space", "comment")), "")
+            # Variable-length bounds (*2..4), path quantifiers ({1,3}) and
+            # "OF n ROWS" must stay literal
+            keep = ((brackets and brackets[-1] == "relationship" and previous in ("*", ".."))
+                    or (brackets and brackets[-1] == "quantifier") or following.upper() == "ROWS")
+        if kind in ("string", "number") and previous.upper() in LITERAL_AFTER:
+            # SHORTEST 2, ANY 2, IN CONCURRENT 4 TRANSACTIONS, FIELDTERMINATOR ';'
+            keep = True
+        if kind in ("string", "number") and not keep:
+            parts.append(f"$lit{len(values)}")
+            values.append(unescape(value) if kind == "string" else number_value(value))
+        else:
+            parts.append(value)
+
+        if value == "[":
+            brackets.append("relationship" if previous == "-" else "list")
+        elif value == "{":
+            quantifier = previous in (")", "-", ">") and QUANTIFIER.match(text, token.start())
+            brackets.append("quantifier" if quantifier else "map")
+        elif value in ("]", "}") and brackets:
+            brackets.pop()
+        previous = value
+
+    shape = "".join(parts).strip()
+    while shape.endswith(";"):
+        shape = shape[:-1].rstrip()
+    return shape, values
+
+class CypherPreparer:
+    def __init__(self, max_size=CYPHER_SHAPE_CACHE_SIZE):
+        self.max_size = max_size
+        self.prepared = OrderedDict()
+        self.shapes = OrderedDict()
+        self.lock = Lock()
+        self.lookups = 0
+        self.text_hits = 0
+        self.shape_hits = 0
+
+    def prepare(self, text, parameters=None):
+        # Returns (shape, parameters) ready for session.run; explicit
+        # parameters are kept as they are
+        with self.lock:
+            self.lookups += 1
+            if text in self.prepared:
+                self.text_hits += 1
+                self.prepared.move_to_end(text)
+                shape, values = self.prepared[text]
+            else:
+                shape, values = parameterize(text) if not UNPREPARED.match(text) else (text, [])
+                self.prepared[text] = (shape, values)
+                if len(self.prepared) > self.max_size:
+                    self.prepared.popitem(last=False)
+
+            # Counted on the client: a repeated shape can reuse the server's
+            # plan, but whether it did is only known to the server
+            if shape in self.shapes:
+                self.shape_hits += 1
+                self.shapes.move_to_end(shape)
+            else:
+                self.shapes[shape] = True
+                if len(self.shapes) > self.max_size:
+                    self.shapes.popitem(last=False)
+
+        merged = {f"lit{i}": value for i, value in enumerate(values)}
+        merged.update(parameters or {})
+        return shape, merged
+
+    def stats(self):
+        with self.lock:
+            return {
+                "lookups": self.lookups,
+                "text_hits": self.text_hits,
+                "shape_hits": self.shape_hits,
+                "shapes": len(self.shapes),
+                "text_hit_rate": self.text_hits / self.lookups if self.lookups else 0.0,
+                "shape_reuse_rate": self.shape_hits / self.lookups if self.lookups else 0.0
+            }
+
+    def keep_literals(self, text, parameters=None):
+        # Sends text as written from now on, for shapes the server rejected
+        with self.lock:
+            self.prepared[text] = (text, [])
+        return text, dict(parameters or {})
+
+# Shared by every Neo4j query run in this process
+CYPHER_PREPARER = CypherPreparer()
+
+def prepare_cypher(text, parameters=None):
+    return CYPHER_PREPARER.prepare(text, parameters)
+
+def is_syntax_error(error):
+    return isinstance(error, Neo4jError) and error.code == SYNTAX_ERROR
+
+def run_prepared(session, text, parameters=None, governor=None):
+    # session.run on the prepared shape, rerunning the raw text when the
+    # server cannot parse the shape
+    shape, prepared_parameters = prepare_cypher(text, parameters)
+    try:
+        return session.run(governor.neo4j_query(shape) if governor else shape, prepared_parameters)
+    except Neo4jError as e:
+        if not is_syntax_error(e):
+            raise
+        text, parameters = CYPHER_PREPARER.keep_literals(text, parameters)
+        return session.run(governor.neo4j_query(text) if governor else text, parameters)
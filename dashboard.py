@@ -0,0 +1,37 @@
+# dashboard.py
+# Runs the whole MongoDB and Neo4j catalogue on a bounded thread pool and
+# yields each result as soon as it is ready, so the total time is close to
+# the slowest query rather than the sum of all of them.
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import DASHBOARD_WORKERS
+from mongodb_queries import QUERIES
+from neo4j_queries import QUERIES as NEO4J_QUERIES
+from query_governor import QueryGovernor
+from query_runner import run_mongo_query, run_neo4j_query, EXAMPLE_PARAMETERS
+
+def catalogue():
+    # (engine, query name) for every entry that can run without user input
+    entries = [("MongoDB", name) for name, info in QUERIES.items()
+               if not info.get("parameters") or name in EXAMPLE_PARAMETERS]
+    entries += [("Neo4j", name) for name, info in NEO4J_QUERIES.items() if "query" in info]
+    return entries
+
+def timed_run(collection, engine, name):
+    started = time.perf_counter()
+    try:
+        if engine == "MongoDB":
+            result = run_mongo_query(collection, name, parameters=EXAMPLE_PARAMETERS.get(name), governor=QueryGovernor())
+        else:
+            result = run_neo4j_query(name, EXAMPLE_PARAMETERS.get(name), governor=QueryGovernor())
+        error = None
+    except Exception as e:
+        result, error = None, str(e)
+    return engine, name, result, error, time.perf_counter() - started
+
+def run_all(collection, entries, max_workers=DASHBOARD_WORKERS):
+    # Yields (engine, name, result, error, seconds) in completion order
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(timed_run, collection, engine, name) for engine, name in entries]
+        for future in as_completed(futures):
+            yield future.result()
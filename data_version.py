@@ -0,0 +1,30 @@
+# data_version.py
+# A counter stored in MongoDB that the importer bumps whenever the data behind
+# the predefined queries changes. Readers use it to invalidate cached results.
+from datetime import datetime, timezone
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from config import META_COLLECTION
+from connections import get_database
+
+DATA_VERSION_ID = "data_version"
+
+def get_data_version():
+    try:
+        doc = get_database()[META_COLLECTION].find_one({"_id": DATA_VERSION_ID})
+    except PyMongoError:
+        return None
+    return doc["version"] if doc else 0
+
+def bump_data_version(source):
+    try:
+        doc = get_database()[META_COLLECTION].find_one_and_update(
+            {"_id": DATA_VERSION_ID},
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now(timezone.utc), "source": source}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
+    except PyMongoError as e:
+        print(f"Error updating data version: {e}")
+        return None
@@ -0,0 +1,78 @@
+# derivations.py
+# Derived director relationships that used to be MERGEd by the catalogue on
+# every run. INFLUENCED_BY links directors with films in a shared genre and
+# COMPETES_WITH directors with films in a shared genre in the same year; both
+# are stored in both directions. A job drops and recomputes every derived
+# relationship of a batch of directors in one transaction, so reruns are
+# idempotent and a sync only has to redo the directors of the changed films.
+# The rebuild runs them on the staging labels before the graph is swapped in.
+import argparse
+from tqdm import tqdm
+from neo4j.exceptions import Neo4jError
+from connections import neo4j_session, close_connections
+from graph_labels import LIVE_LABELS, with_labels
+from materialize import bump_data_version_keeping_summaries
+
+# Directors whose derived relationships are recomputed per transaction
+DERIVATION_BATCH_SIZE = 50
+
+DERIVATIONS = {
+    "INFLUENCED_BY": """
+        UNWIND $names AS name
+        MATCH (d:Director {name: name})-[:DIRECTED]->(:Film)-[:HAS_GENRE]->(g:Genre)<-[:HAS_GENRE]-(:Film)<-[:DIRECTED]-(other:Director)
+        WHERE d <> other
+        WITH DISTINCT d, other, g.name AS genre
+        MERGE (d)-[:INFLUENCED_BY {genre: genre}]->(other)
+        MERGE (other)-[:INFLUENCED_BY {genre: genre}]->(d)
+    """,
+    "COMPETES_WITH": """
+        UNWIND $names AS name
+        MATCH (d:Director {name: name})-[:DIRECTED]->(f:Film)-[:HAS_GENRE]->(g:Genre)<-[:HAS_GENRE]-(f2:Film)<-[:DIRECTED]-(other:Director)
+        WHERE d <> other AND f.year = f2.year
+        WITH DISTINCT d, other, f.year AS year, g.name AS genre
+        MERGE (d)-[:COMPETES_WITH {year: year, genre: genre}]->(other)
+        MERGE (other)-[:COMPETES_WITH {year: year, genre: genre}]->(d)
+    """
+}
+
+DROP_DERIVED_QUERY = """
+    UNWIND $names AS name
+    MATCH (:Director {name: name})-[r:INFLUENCED_BY|COMPETES_WITH]-(:Director)
+    DELETE r
+"""
+
+def refresh_derived(tx, names, labels=LIVE_LABELS):
+    tx.run(with_labels(DROP_DERIVED_QUERY, labels), names=names)
+    for query in DERIVATIONS.values():
+        tx.run(with_labels(query, labels), names=names)
+
+def derive_relationships(directors=None, batch_size=DERIVATION_BATCH_SIZE, labels=LIVE_LABELS):
+    # Every director when directors is None, otherwise only the given ones.
+    # Returns True when all batches were written.
+    try:
+        with neo4j_session() as session:
+            if directors is None:
+                directors = [record["name"] for record in session.run(with_labels("MATCH (d:Director) RETURN d.name AS name", labels))]
+            directors = sorted(set(directors))
+            with tqdm(total=len(directors), desc="Deriving director relationships", unit="directors") as progress:
+                for start in range(0, len(directors), batch_size):
+                    batch = directors[start:start + batch_size]
+                    session.execute_write(refresh_derived, batch, labels)
+                    progress.update(len(batch))
+        return True
+    except Neo4jError as e:
+        print(f"Error deriving director relationships: {e}")
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the INFLUENCED_BY and COMPETES_WITH relationships")
+    parser.add_argument("--directors", nargs="+",
+                        help="only recompute the relationships of these directors")
+    parser.add_argument("--batch-size", type=int, default=DERIVATION_BATCH_SIZE,
+                        help="directors processed per Neo4j transaction")
+    args = parser.parse_args()
+
+    # Cached INFLUENCED_BY/COMPETES_WITH results are keyed on the data version
+    if derive_relationships(args.directors, args.batch_size):
+        bump_data_version_keeping_summaries("derivations")
+    close_connections()
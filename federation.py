@@ -0,0 +1,85 @@
+# federation.py
+# Joins Neo4j results with the film documents in MongoDB. Film ids
+# (Film.id is the Mongo _id as a string) are collected from film_id /
+# film<n>_id columns, Film node columns and path nodes, fetched with one
+# projected $in query per batch and merged into the frames in memory.
+import re
+from config import FEDERATION_BATCH_SIZE
+from connections import get_films_collection
+from materialize import to_object_id
+
+# Column added to the Neo4j result -> Mongo field variants it is read from,
+# the first one set wins (the same variants legacy_row and normalize.py accept)
+FEDERATED_FIELDS = {
+    "rating": ["rating", "Rating"],
+    "revenue": ["revenue", "Revenue (Millions)"],
+    "runtime": ["runtime_minutes", "Runtime (Minutes)"],
+    "votes": ["Votes", "votes"],
+    "metascore": ["Metascore", "metascore"]
+}
+
+ID_COLUMN = re.compile(r"^(film\d*)_id$")
+
+def id_columns(frame):
+    # {column: prefix of the columns joined onto it}
+    columns = {}
+    for column in frame.columns:
+        match = ID_COLUMN.match(str(column))
+        if match:
+            columns[column] = "" if match.group(1) == "film" else f"{match.group(1)}_"
+    return columns
+
+def node_columns(frame):
+    # Columns holding Film nodes, which result_to_frames turns into property dicts
+    return [column for column in frame.columns
+            if any(isinstance(value, dict) and "id" in value and "title" in value for value in frame[column])]
+
+def collect_ids(frame, paths=None):
+    ids = set()
+    for column in id_columns(frame):
+        ids.update(value for value in frame[column] if isinstance(value, str))
+    for column in node_columns(frame):
+        ids.update(value["id"] for value in frame[column] if isinstance(value, dict) and value.get("id"))
+    if paths and "id" in paths["nodes"]:
+        ids.update(value for value in paths["nodes"]["id"] if isinstance(value, str))
+    return ids
+
+def fetch_films(collection, ids, batch_size=FEDERATION_BATCH_SIZE):
+    # {film id: {column: value}}, one $in query per batch of ids
+    projection = {field: 1 for fields in FEDERATED_FIELDS.values() for field in fields}
+    ids = sorted(ids)
+    films = {}
+    for start in range(0, len(ids), batch_size):
+        batch = [to_object_id(film_id) for film_id in ids[start:start + batch_size]]
+        for document in collection.find({"_id": {"$in": batch}}, projection):
+            films[str(document["_id"])] = {column: next((document[field] for field in fields if document.get(field) is not None), None)
+                                           for column, fields in FEDERATED_FIELDS.items()}
+    return films
+
+def joined_columns(values, films, prefix):
+    return {f"{prefix}{column}": [films.get(value, {}).get(column) for value in values]
+            for column in FEDERATED_FIELDS}
+
+def federate(frame, paths=None, collection=None, batch_size=FEDERATION_BATCH_SIZE):
+    # Returns (frame, paths) with the film fields added next to every film reference
+    if collection is None:
+        collection = get_films_collection()
+    ids = collect_ids(frame, paths)
+    if not ids:
+        return frame, paths
+    films = fetch_films(collection, ids, batch_size)
+
+    frame = frame.copy()
+    for column, prefix in id_columns(frame).items():
+        for name, values in joined_columns(frame[column], films, prefix).items():
+            frame[name] = values
+    for column in node_columns(frame):
+        film_ids = [value.get("id") if isinstance(value, dict) else None for value in frame[column]]
+        for name, values in joined_columns(film_ids, films, f"{column}.").items():
+            frame[name] = values
+    if paths and "id" in paths["nodes"]:
+        nodes = paths["nodes"].copy()
+        for name, values in joined_columns(nodes["id"], films, "").items():
+            nodes[name] = values
+        paths = {**paths, "nodes": nodes}
+    return frame, paths
@@ -0,0 +1,126 @@
+# generate_data.py
+# Generates a synthetic film catalogue in the same document shape as
+# entertainment.films, so import_data and QUERIES can be exercised at 10x,
+# 100x or 1000x the size of the real dataset. Actor and director popularity
+# follow a Zipf law, cast sizes a shifted power law and genres a fixed mix.
+import argparse
+import bisect
+import itertools
+import random
+from tqdm import tqdm
+from pymongo.errors import PyMongoError
+from config import DB_COLLECTION, SYNTHETIC_DB_NAME
+from connections import get_mongo_client, close_connections
+
+# Sizes of the real dataset at scale 1
+BASE_FILMS = 1000
+BASE_ACTORS = 2400
+BASE_DIRECTORS = 650
+
+ZIPF_EXPONENT = 0.5
+CAST_SIZE_EXPONENT = 2.5
+MIN_CAST = 3
+MAX_CAST = 15
+INSERT_BATCH_SIZE = 5000
+
+GENRE_MIX = {
+    "Drama": 0.20, "Action": 0.13, "Comedy": 0.12, "Adventure": 0.11, "Thriller": 0.08,
+    "Crime": 0.07, "Romance": 0.06, "Sci-Fi": 0.05, "Horror": 0.05, "Mystery": 0.04,
+    "Fantasy": 0.03, "Biography": 0.03, "Family": 0.02, "Animation": 0.02
+}
+# The most popular synthetic actors keep names the predefined queries use
+FAMOUS_ACTORS = ["Anne Hathaway", "Christian Bale"]
+
+FIRST_NAMES = ["Alex", "Maria", "John", "Lucia", "David", "Emma", "Pablo", "Sofia", "James", "Laura",
+               "Daniel", "Carmen", "Michael", "Elena", "Robert", "Sara", "Thomas", "Julia", "Peter", "Ana"]
+LAST_NAMES = ["Smith", "Garcia", "Johnson", "Martinez", "Brown", "Lopez", "Davis", "Sanchez", "Miller",
+              "Perez", "Wilson", "Gomez", "Moore", "Diaz", "Taylor", "Romero", "Clark", "Navarro"]
+TITLE_WORDS = ["Night", "Return", "Shadow", "Empire", "Last", "City", "Dream", "Storm", "Secret", "Road",
+               "Fire", "Silent", "Lost", "Kingdom", "Edge", "Heart", "Winter", "Legacy", "Rising", "Code"]
+
+def person_names(count):
+    # Unique, readable names: "First Last", then "First Last 2", ...
+    names = []
+    for suffix in itertools.count(1):
+        for first, last in itertools.product(FIRST_NAMES, LAST_NAMES):
+            if len(names) >= count:
+                return names
+            names.append(f"{first} {last}" + (f" {suffix}" if suffix > 1 else ""))
+
+def zipf_cumulative_weights(count, exponent):
+    total, weights = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
+def zipf_pick(rng, cumulative):
+    return bisect.bisect_left(cumulative, rng.random() * cumulative[-1])
+
+def cast_size(rng):
+    # Inverse transform sampling of a power law shifted to MIN_CAST, redrawn above MAX_CAST
+    while True:
+        size = MIN_CAST + int((1 - rng.random()) ** (-1 / (CAST_SIZE_EXPONENT - 1))) - 1
+        if size <= MAX_CAST:
+            return size
+
+def generate_film(rng, index, actors, actor_weights, directors, director_weights):
+    year = rng.choices(range(1950, 2017), weights=[1 + (y - 1950) ** 2 for y in range(1950, 2017)])[0]
+    cast = set()
+    wanted = cast_size(rng)
+    while len(cast) < min(wanted, len(actors)):
+        cast.add(actors[zipf_pick(rng, actor_weights)])
+    genres = set(rng.choices(list(GENRE_MIX), weights=list(GENRE_MIX.values()), k=rng.randint(1, 3)))
+    revenue = round(rng.lognormvariate(3.4, 1.6), 2) if rng.random() > 0.12 else None
+    metascore = min(100, max(1, int(rng.gauss(59, 17)))) if rng.random() > 0.06 else None
+
+    return {
+        "Rank": index + 1,
+        "title": f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} {index + 1}",
+        "genre": ",".join(sorted(genres)),
+        "Director": directors[zipf_pick(rng, director_weights)],
+        "Actors": ", ".join(sorted(cast)),
+        "year": year,
+        "Runtime (Minutes)": max(60, int(rng.gauss(113, 19))),
+        "rating": round(min(10.0, max(1.0, rng.gauss(6.7, 0.95))), 1),
+        "Votes": int(rng.lognormvariate(11, 1.4)),
+        "Revenue (Millions)": revenue,
+        "Metascore": metascore
+    }
+
+def generate(scale=1.0, seed=42, database=SYNTHETIC_DB_NAME, collection=DB_COLLECTION, drop=False):
+    rng = random.Random(seed)
+    film_count = int(BASE_FILMS * scale)
+    actors = person_names(max(int(BASE_ACTORS * scale), len(FAMOUS_ACTORS)))
+    actors = FAMOUS_ACTORS + rng.sample([a for a in actors if a not in FAMOUS_ACTORS], len(actors) - len(FAMOUS_ACTORS))
+    directors = person_names(max(int(BASE_DIRECTORS * scale), 1))
+    rng.shuffle(directors)
+    actor_weights = zipf_cumulative_weights(len(actors), ZIPF_EXPONENT)
+    director_weights = zipf_cumulative_weights(len(directors), ZIPF_EXPONENT)
+
+    target = get_mongo_client()[database][collection]
+    try:
+        if drop:
+            target.drop()
+        batch = []
+        for index in tqdm(range(film_count), desc="Generating films", unit="films"):
+            batch.append(generate_film(rng, index, actors, actor_weights, directors, director_weights))
+            if len(batch) >= INSERT_BATCH_SIZE:
+                target.insert_many(batch, ordered=False)
+                batch = []
+        if batch:
+            target.insert_many(batch, ordered=False)
+        print(f"Inserted {film_count} synthetic films into {database}.{collection}")
+    except PyMongoError as e:
+        print(f"Error inserting synthetic films: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic film catalogue in MongoDB")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiple of the real dataset size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database", default=SYNTHETIC_DB_NAME)
+    parser.add_argument("--collection", default=DB_COLLECTION)
+    parser.add_argument("--drop", action="store_true", help="drop the target collection first")
+    args = parser.parse_args()
+    generate(args.scale, args.seed, args.database, args.collection, args.drop)
+    close_connections()
@@ -0,0 +1,316 @@
+# graph_engine.py
+# Optional in-process engine for path and neighbourhood queries. The
+# Actor/Film/Director/Genre graph is snapshotted from Neo4j or straight from
+# MongoDB into CSR adjacency arrays over integer node ids (every edge is
+# stored in both directions) and saved as .npy files that are memory-mapped
+# on load, so BFS-style queries run locally without a Neo4j round trip.
+# Names are looked up through a persisted (kind, name) sorted index with
+# binary search, so loading never walks every node.
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from neo4j.exceptions import Neo4jError
+from pymongo.errors import PyMongoError
+from config import GRAPH_SNAPSHOT_DIR
+from connections import get_films_collection, neo4j_session, close_connections
+from data_version import get_data_version
+from neo4j_data import film_row
+
+KINDS = ["Film", "Actor", "Director", "Genre"]
+EDGE_TYPES = ["ACTED_IN", "DIRECTED", "HAS_GENRE"]
+ARRAYS = ["indptr", "indices", "edge_types", "kinds", "keys", "names", "name_order", "sorted_names", "kind_offsets"]
+
+class GraphBuilder:
+    # Collects nodes and edges before they are packed into CSR arrays
+    def __init__(self):
+        self.ids = {}
+        self.kinds = []
+        self.keys = []
+        self.names = []
+        self.edges = set()
+
+    def node(self, kind, key, name=None):
+        node_id = self.ids.get((kind, key))
+        if node_id is None:
+            node_id = self.ids[(kind, key)] = len(self.kinds)
+            self.kinds.append(KINDS.index(kind))
+            self.keys.append(key)
+            self.names.append(name if name is not None else key)
+        return node_id
+
+    def edge(self, source, target, edge_type):
+        self.edges.add((source, target, EDGE_TYPES.index(edge_type)))
+
+    def build(self):
+        n = len(self.kinds)
+        edges = np.array(sorted(self.edges), dtype=np.int64).reshape(-1, 3)
+        # Both directions, grouped by source node
+        sources = np.concatenate([edges[:, 0], edges[:, 1]])
+        targets = np.concatenate([edges[:, 1], edges[:, 0]])
+        types = np.concatenate([edges[:, 2], edges[:, 2]])
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+        kinds = np.array(self.kinds, dtype=np.int8)
+        names = np.array(self.names, dtype=str)
+        # Node ids by kind, then name; lexsort is stable, so duplicate names
+        # keep their lowest id first
+        name_order = np.lexsort((names, kinds))
+        kind_offsets = np.zeros(len(KINDS) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(kinds, minlength=len(KINDS)), out=kind_offsets[1:])
+        return {
+            "indptr": indptr,
+            "indices": targets[order].astype(np.int32),
+            "edge_types": types[order].astype(np.int8),
+            "kinds": kinds,
+            "keys": np.array(self.keys, dtype=str),
+            "names": names,
+            "name_order": name_order.astype(np.int64),
+            "sorted_names": names[name_order],
+            "kind_offsets": kind_offsets
+        }
+
+def snapshot_from_mongo():
+    builder = GraphBuilder()
+    films = get_films_collection()
+    for film in tqdm(films.find(), total=films.estimated_document_count(), desc="Reading films", unit="films"):
+        row = film_row(film)
+        film_id = builder.node("Film", row["id"], row["title"])
+        if row["director"]:
+            builder.edge(builder.node("Director", row["director"]), film_id, "DIRECTED")
+        for actor in row["actors"]:
+            builder.edge(builder.node("Actor", actor), film_id, "ACTED_IN")
+        for genre in row["genres"]:
+            builder.edge(film_id, builder.node("Genre", genre), "HAS_GENRE")
+    return builder.build()
+
+def snapshot_from_neo4j():
+    builder = GraphBuilder()
+    with neo4j_session() as session:
+        nodes = {}
+        for record in session.run("""
+            MATCH (n) WHERE n:Film OR n:Actor OR n:Director OR n:Genre
+            RETURN elementId(n) AS eid, [l IN labels(n) WHERE l IN $kinds][0] AS kind,
+                   coalesce(n.id, n.title, n.name) AS key, coalesce(n.title, n.name) AS name
+        """, kinds=KINDS):
+            nodes[record["eid"]] = builder.node(record["kind"], record["key"], record["name"])
+        for record in session.run("""
+            MATCH (a)-[r:ACTED_IN|DIRECTED|HAS_GENRE]->(b)
+            RETURN elementId(a) AS source, elementId(b) AS target, type(r) AS type
+        """):
+            builder.edge(nodes[record["source"]], nodes[record["target"]], record["type"])
+    return builder.build()
+
+def save_snapshot(arrays, source, directory=GRAPH_SNAPSHOT_DIR):
+    # Write next to the old snapshot and swap directories, so a reader never
+    # maps a half-written set of arrays
+    tmp_dir = f"{directory}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name in ARRAYS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), arrays[name])
+    meta = {
+        "source": source,
+        "nodes": len(arrays["kinds"]),
+        "edges": len(arrays["indices"]) // 2,
+        "data_version": get_data_version(),
+        "built_at": datetime.now(timezone.utc).isoformat()
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+    return meta
+
+class GraphSnapshot:
+    def __init__(self, directory=GRAPH_SNAPSHOT_DIR):
+        for name in ARRAYS:
+            path = os.path.join(directory, f"{name}.npy")
+            if not os.path.exists(path):
+                raise ValueError(f"The graph snapshot in {directory} predates {name}.npy, rebuild it with --build")
+            setattr(self, name, np.load(path, mmap_mode="r"))
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+
+    def is_current(self):
+        return self.meta["data_version"] == get_data_version()
+
+    def node(self, kind, name):
+        # Binary search in the kind's slice of the sorted name index
+        start, end = self.kind_offsets[KINDS.index(kind)], self.kind_offsets[KINDS.index(kind) + 1]
+        position = start + np.searchsorted(self.sorted_names[start:end], name)
+        if position >= end or self.sorted_names[position] != name:
+            raise ValueError(f"No {kind} named {name!r} in the graph snapshot")
+        return int(self.name_order[position])
+
+    def describe(self, node_id):
+        kind = KINDS[self.kinds[node_id]]
+        return {"kind": kind, "name": str(self.names[node_id]),
+                "film_id": str(self.keys[node_id]) if kind == "Film" else None}
+
+    def expand(self, frontier, edge_types=None):
+        # Neighbours of every frontier node as (neighbours, parents) arrays,
+        # gathered from the CSR slices without a Python loop
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        positions = np.arange(counts.sum()) + offsets
+        neighbours = self.indices[positions]
+        parents = np.repeat(frontier, counts)
+        if edge_types is not None:
+            mask = np.isin(self.edge_types[positions], [EDGE_TYPES.index(t) for t in edge_types])
+            neighbours, parents = neighbours[mask], parents[mask]
+        return neighbours, parents
+
+    def shortest_path(self, source, target, edge_types=None):
+        # Bidirectional BFS that always grows the smaller frontier; returns
+        # the node ids of one shortest path, or None if there is none
+        if source == target:
+            return [source]
+        n = len(self.kinds)
+        parent = [np.full(n, -1, dtype=np.int64), np.full(n, -1, dtype=np.int64)]
+        depth = [np.full(n, -1, dtype=np.int32), np.full(n, -1, dtype=np.int32)]
+        frontier = [np.array([source]), np.array([target])]
+        for side, node in enumerate((source, target)):
+            parent[side][node] = node
+            depth[side][node] = 0
+
+        while len(frontier[0]) and len(frontier[1]):
+            side = 0 if len(frontier[0]) <= len(frontier[1]) else 1
+            neighbours, parents = self.expand(frontier[side], edge_types)
+            new = parent[side][neighbours] == -1
+            nodes, first = np.unique(neighbours[new], return_index=True)
+            parent[side][nodes] = parents[new][first]
+            depth[side][nodes] = depth[side][frontier[side][0]] + 1
+            frontier[side] = nodes
+
+            met = nodes[depth[1 - side][nodes] >= 0]
+            if len(met):
+                middle = met[np.argmin(depth[1 - side][met])]
+                return self.walk(parent[0], middle)[::-1] + self.walk(parent[1], middle)[1:]
+        return None
+
+    @staticmethod
+    def walk(parent, node):
+        path = [int(node)]
+        while parent[node] != node:
+            node = parent[node]
+            path.append(int(node))
+        return path
+
+    def k_hop(self, node, k, edge_types=None):
+        # Every node within k hops mapped to its distance
+        distances = {node: 0}
+        frontier = np.array([node])
+        for hop in range(1, k + 1):
+            neighbours, _ = self.expand(frontier, edge_types)
+            frontier = np.array([v for v in np.unique(neighbours).tolist() if v not in distances], dtype=np.int64)
+            if not len(frontier):
+                break
+            distances.update(dict.fromkeys(frontier.tolist(), hop))
+        return distances
+
+    def degrees(self, edge_type=None):
+        if edge_type is None:
+            return np.diff(self.indptr)
+        rows = np.repeat(np.arange(len(self.kinds)), np.diff(self.indptr))
+        mask = self.edge_types == EDGE_TYPES.index(edge_type)
+        return np.bincount(rows[mask], minlength=len(self.kinds))
+
+    def degree_ranking(self, kind, edge_type=None, top=10):
+        degrees = self.degrees(edge_type)
+        candidates = np.flatnonzero(self.kinds == KINDS.index(kind))
+        ranked = candidates[np.argsort(-degrees[candidates], kind="stable")[:top]]
+        return [(str(self.names[i]), int(degrees[i])) for i in ranked]
+
+_SNAPSHOT = None
+_SNAPSHOT_STAMP = None
+
+def get_snapshot():
+    # Mapped once per build: a rebuild replaces meta.json, which remaps the
+    # new arrays. Returns None until a snapshot has been built.
+    global _SNAPSHOT, _SNAPSHOT_STAMP
+    try:
+        stat = os.stat(os.path.join(GRAPH_SNAPSHOT_DIR, "meta.json"))
+    except FileNotFoundError:
+        return _SNAPSHOT
+    stamp = (stat.st_ino, stat.st_mtime_ns)
+    if _SNAPSHOT is None or stamp != _SNAPSHOT_STAMP:
+        _SNAPSHOT = GraphSnapshot()
+        _SNAPSHOT_STAMP = stamp
+    return _SNAPSHOT
+
+# Catalogue entries of neo4j_queries.QUERIES the engine can answer locally
+def local_shortest_path(snapshot, parameters):
+    path = snapshot.shortest_path(snapshot.node("Actor", parameters["actor_name1"]),
+                                  snapshot.node("Actor", parameters["actor_name2"]), ["ACTED_IN"])
+    return pd.DataFrame([snapshot.describe(node) for node in path or []])
+
+def local_actor_films(snapshot, parameters):
+    films = snapshot.k_hop(snapshot.node("Actor", parameters["actor_name"]), 1, ["ACTED_IN"])
+    rows = sorted({(film["name"], film["film_id"]) for film in (snapshot.describe(node) for node, hop in films.items() if hop == 1)})
+    return pd.DataFrame(rows, columns=["film", "film_id"])
+
+def local_actor_most_films(snapshot, parameters):
+    return pd.DataFrame(snapshot.degree_ranking("Actor", "ACTED_IN", top=1), columns=["actor", "film_count"])
+
+LOCAL_QUERIES = {
+    "shortest_path_between_actors": local_shortest_path,
+    "recommended_films_based_on_actor": local_actor_films,
+    "actor_most_films": local_actor_most_films
+}
+
+def run_local_query(query_name, parameters=None):
+    snapshot = get_snapshot()
+    if snapshot is None:
+        raise ValueError(f"No graph snapshot in {GRAPH_SNAPSHOT_DIR}, build one with graph_engine.py --build")
+    return LOCAL_QUERIES[query_name](snapshot, parameters or {})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the in-process CSR graph snapshot")
+    parser.add_argument("--build", choices=["mongo", "neo4j"],
+                        help="snapshot the graph from MongoDB or Neo4j")
+    parser.add_argument("--path", nargs=2, metavar=("ACTOR1", "ACTOR2"),
+                        help="shortest ACTED_IN path between two actors")
+    parser.add_argument("--k-hop", nargs=2, metavar=("ACTOR", "K"),
+                        help="nodes within K hops of an actor")
+    parser.add_argument("--top", choices=KINDS,
+                        help="nodes of this kind ranked by degree")
+    args = parser.parse_args()
+
+    if args.build:
+        try:
+            arrays = snapshot_from_mongo() if args.build == "mongo" else snapshot_from_neo4j()
+            meta = save_snapshot(arrays, args.build)
+            print(f"Snapshot saved to {GRAPH_SNAPSHOT_DIR}: {meta['nodes']} nodes, {meta['edges']} edges")
+        except (PyMongoError, Neo4jError) as e:
+            print(f"Error building graph snapshot: {e}")
+
+    snapshot = get_snapshot()
+    if snapshot is None:
+        if args.path or args.k_hop or args.top:
+            print(f"No graph snapshot in {GRAPH_SNAPSHOT_DIR}, build one with --build")
+    else:
+        if not snapshot.is_current():
+            print("Warning: the data changed since this snapshot was built")
+        started = time.perf_counter()
+        if args.path:
+            path = snapshot.shortest_path(snapshot.node("Actor", args.path[0]), snapshot.node("Actor", args.path[1]),
+                                          ["ACTED_IN"])
+            print(" -> ".join(snapshot.describe(node)["name"] for node in path) if path else "No path found")
+        if args.k_hop:
+            distances = snapshot.k_hop(snapshot.node("Actor", args.k_hop[0]), int(args.k_hop[1]))
+            for node, hop in sorted(distances.items(), key=lambda item: item[1]):
+                print(hop, snapshot.describe(node))
+        if args.top:
+            for name, degree in snapshot.degree_ranking(args.top):
+                print(f"{name}: {degree}")
+        if args.path or args.k_hop or args.top:
+            print(f"Answered in {(time.perf_counter() - started) * 1000:.1f} ms")
+    close_connections()
@@ -0,0 +1,26 @@
+# graph_labels.py
+# Label sets of the blue/green rebuild. Queries are written against the live
+# labels and pointed at the staging or retired graph with with_labels, so the
+# import and every derived-data job can run on a graph before it is swapped in.
+# The swap itself is batched and flagged by a marker node that reads check.
+import re
+
+LIVE_LABELS = {"Film": "Film", "Actor": "Actor", "Director": "Director", "Genre": "Genre"}
+STAGING_LABELS = {label: f"Staging{label}" for label in LIVE_LABELS}
+RETIRED_LABELS = {label: f"Retired{label}" for label in LIVE_LABELS}
+
+def with_labels(query, labels):
+    # Point a query written against the live labels at another label set
+    return re.sub(r":(Film|Actor|Director|Genre)\b", lambda m: ":" + labels[m.group(1)], query)
+
+# Present while swap_staging relabels the graph in batches, holding the phase
+# reached; reads refuse to run on the half-swapped graph until it is gone
+SWAP_MARKER = "GraphSwap"
+
+def swap_phase(session):
+    record = session.run(f"MATCH (s:{SWAP_MARKER}) RETURN s.phase AS phase LIMIT 1").single()
+    return record["phase"] if record else None
+
+def ensure_graph_ready(session):
+    if swap_phase(session) is not None:
+        raise ValueError("A rebuilt graph is being swapped in, retry in a moment")
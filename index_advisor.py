@@ -0,0 +1,170 @@
+# index_advisor.py
+# Explains every catalogued query on both stores, looks for collection scans
+# (MongoDB) and label/all-node scans (Neo4j), creates the indexes that would
+# remove them and prints the plans before and after.
+import argparse
+import re
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+from neo4j.exceptions import Neo4jError
+from connections import get_database, get_films_collection, neo4j_session, close_connections
+from mongodb_queries import QUERIES, TEMPLATES
+from query_runner import EXAMPLE_PARAMETERS
+from neo4j_queries import QUERIES as NEO4J_QUERIES
+
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$exists", "$type", "$nin", "$regex"}
+SCAN_OPERATORS = {"NodeByLabelScan", "AllNodesScan"}
+
+# ---------------------------------------------------------------- MongoDB
+
+def find_stages(plan):
+    # Every "stage" name in an explain document, wherever the server nests it
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"] + (f" {plan['indexName']}" if "indexName" in plan else ""))
+        for value in plan.values():
+            stages.extend(find_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(find_stages(value))
+    return stages
+
+def explain_mongo(db, query_info):
+    collection = db[query_info.get("collection", get_films_collection().name)]
+    query = query_info["query"]
+    if query_info["type"] == "aggregate":
+        return db.command("aggregate", collection.name, pipeline=query, explain=True)
+    if query_info["type"] == "count":
+        return db.command("explain", {"count": collection.name, "query": query}, verbosity="queryPlanner")
+    if query_info["type"] == "distinct":
+        return db.command("explain", {"distinct": collection.name, "key": query_info["field"], "query": query},
+                          verbosity="queryPlanner")
+    return collection.find(query, query_info.get("projection")).explain()
+
+def candidate_index(query_info):
+    # Equality, sort, range ordering for the fields the query filters and sorts on
+    if query_info["type"] == "aggregate":
+        # Only a leading $match and the $sort right after it can use an index
+        match, sort = {}, {}
+        for stage in query_info["query"][:2]:
+            if "$match" in stage and not match:
+                match = stage["$match"]
+            elif "$sort" in stage:
+                sort = stage["$sort"]
+                break
+            else:
+                break
+    elif query_info["type"] == "distinct":
+        return [(query_info["field"], ASCENDING)]
+    else:
+        match, sort = query_info["query"], {}
+
+    equality, ranges = [], []
+    for field, condition in match.items():
+        if field.startswith("$"):
+            continue
+        if isinstance(condition, dict) and set(condition) & RANGE_OPERATORS:
+            ranges.append((field, ASCENDING))
+        else:
+            equality.append((field, ASCENDING))
+    keys = equality + [(field, direction) for field, direction in sort.items()] + ranges
+    seen = set()
+    return [(field, direction) for field, direction in keys if not (field in seen or seen.add(field))]
+
+def advise_mongo(create=True):
+    db = get_database()
+    report = []
+    for name, query_info in QUERIES.items():
+        try:
+            # Parameterized entries are explained with their example values
+            query_info = {**query_info, "query": TEMPLATES[name].bind(EXAMPLE_PARAMETERS.get(name))}
+            before = find_stages(explain_mongo(db, query_info))
+            keys = candidate_index(query_info)
+            created = None
+            if create and keys and any(stage.startswith("COLLSCAN") for stage in before):
+                collection = db[query_info.get("collection", get_films_collection().name)]
+                created = collection.create_index(keys)
+            after = find_stages(explain_mongo(db, query_info)) if created else before
+            report.append((name, before, created, after))
+        except (PyMongoError, ValueError) as e:
+            report.append((name, [f"error: {e}"], None, []))
+    return report
+
+# ---------------------------------------------------------------- Neo4j
+
+def plan_operators(plan):
+    operators = []
+    if plan:
+        operator = plan["operatorType"].split("@")[0]
+        details = plan.get("args", plan.get("arguments", {})).get("Details", "")
+        operators.append((operator, details))
+        for child in plan.get("children", []):
+            operators.extend(plan_operators(child))
+    return operators
+
+def explain_cypher(session, query):
+    # EXPLAIN plans the query without running it, dummy values satisfy parameters
+    parameters = {name: None for name in re.findall(r"\$(\w+)", query)}
+    return plan_operators(session.run(f"EXPLAIN {query}", parameters).consume().plan)
+
+def property_predicates(query):
+    # (label, property) pairs looked up through an inline map or a WHERE predicate
+    variables = dict(re.findall(r"\(\s*(\w+)\s*:\s*(\w+)", query))
+    pairs = {(label, prop) for label, prop in re.findall(r"\(\s*\w*\s*:\s*(\w+)\s*\{\s*(\w+)\s*:", query)}
+    for variable, prop, operator in re.findall(r"\b(\w+)\.(\w+)\s*(<>|=|>=|<=|>|<|IN\b|IS NOT NULL|STARTS WITH)", query):
+        if variable in variables and operator != "<>":
+            pairs.add((variables[variable], prop))
+    return pairs
+
+def existing_neo4j_indexes(session):
+    indexed = set()
+    for record in session.run("SHOW INDEXES YIELD labelsOrTypes, properties"):
+        if record["labelsOrTypes"] and record["properties"]:
+            indexed.add((record["labelsOrTypes"][0], record["properties"][0]))
+    return indexed
+
+def advise_neo4j(create=True):
+    report = []
+    with neo4j_session() as session:
+        indexed = existing_neo4j_indexes(session)
+        for name, query_info in NEO4J_QUERIES.items():
+            if "query" not in query_info:
+                continue
+            try:
+                before = explain_cypher(session, query_info["query"])
+                scanned = {details.split(":")[-1].strip() for operator, details in before if operator in SCAN_OPERATORS}
+                missing = sorted((label, prop) for label, prop in property_predicates(query_info["query"])
+                                 if label in scanned and (label, prop) not in indexed)
+                created = []
+                if create:
+                    for label, prop in missing:
+                        session.run(f"CREATE INDEX IF NOT EXISTS FOR (n:{label}) ON (n.{prop})").consume()
+                        indexed.add((label, prop))
+                        created.append(f"{label}({prop})")
+                after = explain_cypher(session, query_info["query"]) if created else before
+                report.append((name, [op for op, _ in before], created or None, [op for op, _ in after]))
+            except Neo4jError as e:
+                report.append((name, [f"error: {e.message}"], None, []))
+    return report
+
+def print_report(title, report):
+    print(f"\n{title}")
+    for name, before, created, after in report:
+        print(f"- {name}")
+        print(f"    before: {', '.join(dict.fromkeys(before))}")
+        if created:
+            print(f"    created: {created}")
+            print(f"    after:  {', '.join(dict.fromkeys(after))}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explain the catalogued queries and create missing indexes")
+    parser.add_argument("--dry-run", action="store_true", help="report the plans without creating indexes")
+    parser.add_argument("--store", choices=["mongodb", "neo4j", "both"], default="both")
+    args = parser.parse_args()
+
+    if args.store in ("mongodb", "both"):
+        print_report("MongoDB plans", advise_mongo(create=not args.dry_run))
+    if args.store in ("neo4j", "both"):
+        print_report("Neo4j plans", advise_neo4j(create=not args.dry_run))
+    close_connections()
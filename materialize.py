@@ -0,0 +1,209 @@
+# materialize.py
+# Precomputes the heavy aggregations of mongodb_queries.QUERIES into summary
+# collections with $merge. Each summary stores one document per group (year,
+# decade or genre); reading it only has to sort/limit those few documents.
+# summary_membership remembers which groups every film contributed to, so a
+# changed or deleted film only recomputes the groups it touched.
+import argparse
+import math
+import re
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.errors import PyMongoError
+from config import META_COLLECTION, SUMMARY_COLLECTION_PREFIX, SUMMARY_MEMBERSHIP_COLLECTION
+from connections import get_database, get_films_collection
+from data_version import get_data_version, bump_data_version
+from mongodb_queries import QUERIES
+
+def genre_keys(film):
+    genre = film.get("genre")
+    return genre.split(",") if isinstance(genre, str) else []
+
+def year_keys(film):
+    return [film.get("year")]
+
+def decade_keys(film):
+    year = film.get("year")
+    return [year - year % 10] if isinstance(year, int) else []
+
+def floor_decade_keys(film):
+    year = film.get("year")
+    return [math.floor(year / 10) * 10] if isinstance(year, (int, float)) else []
+
+def genre_filter(keys):
+    return {"$or": [{"genre": {"$regex": f"(^|,){re.escape(key)}(,|$)"}} for key in keys]}
+
+def year_filter(keys):
+    return {"year": {"$in": list(keys)}}
+
+def decade_filter(keys):
+    return {"$or": [{"year": {"$gte": key, "$lt": key + 10}} for key in keys]}
+
+# "split" is the index of the first QUERIES stage that runs on the summary
+# instead of on the films collection; "finish" stages shape the per-group
+# documents before they are stored.
+SUMMARIES = {
+    "films_per_year": {
+        "split": 1,
+        "keys": year_keys,
+        "filter": year_filter
+    },
+    "genre_with_highest_revenue": {
+        "split": 4,
+        "keys": genre_keys,
+        "filter": genre_filter
+    },
+    "top_rated_by_decade": {
+        "split": 4,
+        "finish": [{"$project": {"decade": "$_id", "top_3_films": {"$slice": ["$top_films", 3]}}}],
+        "read": [{"$project": {"_id": 0, "decade": 1, "top_3_films": 1}}, {"$sort": {"decade": 1}}],
+        "keys": decade_keys,
+        "filter": decade_filter
+    },
+    "average_runtime_by_decade": {
+        "split": 3,
+        "keys": floor_decade_keys,
+        "filter": decade_filter
+    },
+    "longest_film_by_genre": {
+        "split": 4,
+        "keys": genre_keys,
+        "filter": genre_filter
+    }
+}
+
+def summary_collection_name(query_name):
+    return f"{SUMMARY_COLLECTION_PREFIX}{query_name}"
+
+def build_pipeline(query_name):
+    summary = SUMMARIES[query_name]
+    return QUERIES[query_name]["query"][:summary["split"]] + summary.get("finish", [])
+
+def read_pipeline(query_name):
+    summary = SUMMARIES[query_name]
+    return summary.get("read", QUERIES[query_name]["query"][summary["split"]:])
+
+def to_object_id(film_id):
+    return ObjectId(film_id) if ObjectId.is_valid(film_id) else film_id
+
+def film_keys(film):
+    return {name: summary["keys"](film) for name, summary in SUMMARIES.items()}
+
+def mark_summary(db, query_name, data_version):
+    db[META_COLLECTION].replace_one(
+        {"_id": f"summary:{query_name}"},
+        {"data_version": data_version, "refreshed_at": datetime.now(timezone.utc)},
+        upsert=True
+    )
+
+def summary_version(db, query_name):
+    meta = db[META_COLLECTION].find_one({"_id": f"summary:{query_name}"})
+    return meta["data_version"] if meta else None
+
+def summary_is_fresh(db, query_name):
+    # A summary is only trusted if it was computed for the current data version
+    if query_name not in SUMMARIES:
+        return False
+    version = summary_version(db, query_name)
+    return version is not None and version == get_data_version()
+
+def bump_data_version_keeping_summaries(source):
+    # For changes the summaries do not read (the graph, the canonical
+    # collection): cached results are invalidated, and the summaries that were
+    # fresh before the bump are stamped with the new version instead of rebuilt
+    data_version = bump_data_version(source)
+    if data_version is None:
+        return None
+    try:
+        db = get_database()
+        for query_name in SUMMARIES:
+            if summary_version(db, query_name) == data_version - 1:
+                mark_summary(db, query_name, data_version)
+    except PyMongoError as e:
+        print(f"Error re-stamping summary collections: {e}")
+    return data_version
+
+def read_summary(db, query_name):
+    return list(db[summary_collection_name(query_name)].aggregate(read_pipeline(query_name)))
+
+def refresh_all(db, films):
+    # Full rebuild: materialize into a temporary collection and rename it over
+    # the live summary so readers never see a half-written one
+    data_version = get_data_version()
+    for query_name in SUMMARIES:
+        target = summary_collection_name(query_name)
+        films.aggregate(build_pipeline(query_name) + [{"$out": f"{target}_tmp"}], allowDiskUse=True)
+        db[f"{target}_tmp"].rename(target, dropTarget=True)
+        mark_summary(db, query_name, data_version)
+
+    membership = db[SUMMARY_MEMBERSHIP_COLLECTION]
+    membership.delete_many({})
+    batch = []
+    for film in films.find({}, {"year": 1, "genre": 1}):
+        batch.append({"_id": str(film["_id"]), "keys": film_keys(film)})
+        if len(batch) >= 1000:
+            membership.insert_many(batch)
+            batch = []
+    if batch:
+        membership.insert_many(batch)
+
+def refresh_incremental(db, films, changed_ids, deleted_ids):
+    data_version = get_data_version()
+    # The delta only applies to summaries that were current before the bump
+    # announcing it; a summary that missed an earlier refresh is rebuilt
+    if data_version is None or any(summary_version(db, name) != data_version - 1 for name in SUMMARIES):
+        refresh_all(db, films)
+        return
+    membership = db[SUMMARY_MEMBERSHIP_COLLECTION]
+    touched = list(changed_ids) + list(deleted_ids)
+
+    # Groups the films belonged to before and after the change
+    affected = {name: set() for name in SUMMARIES}
+    for doc in membership.find({"_id": {"$in": touched}}):
+        for name, keys in doc["keys"].items():
+            affected.setdefault(name, set()).update(keys)
+    current = list(films.find({"_id": {"$in": [to_object_id(i) for i in changed_ids]}}, {"year": 1, "genre": 1}))
+    for film in current:
+        for name, keys in film_keys(film).items():
+            affected[name].update(keys)
+
+    for query_name, summary in SUMMARIES.items():
+        keys = list(affected[query_name])
+        if not keys:
+            mark_summary(db, query_name, data_version)
+            continue
+        target = db[summary_collection_name(query_name)]
+        # Groups that lost all their films must disappear, the rest are rewritten
+        target.delete_many({"_id": {"$in": keys}})
+        films.aggregate(
+            [{"$match": summary["filter"](keys)}]
+            + build_pipeline(query_name)
+            + [{"$match": {"_id": {"$in": keys}}},
+               {"$merge": {"into": target.name, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}],
+            allowDiskUse=True
+        )
+        mark_summary(db, query_name, data_version)
+
+    operations = [ReplaceOne({"_id": str(film["_id"])}, {"keys": film_keys(film)}, upsert=True) for film in current]
+    operations += [DeleteOne({"_id": film_id}) for film_id in deleted_ids]
+    if operations:
+        membership.bulk_write(operations, ordered=False)
+
+def refresh_summaries(changed_ids=None, deleted_ids=None):
+    # With no ids every summary is rebuilt, otherwise only the affected groups
+    db = get_database()
+    films = get_films_collection()
+    try:
+        if changed_ids is None and deleted_ids is None:
+            refresh_all(db, films)
+        else:
+            refresh_incremental(db, films, changed_ids or [], deleted_ids or [])
+        print("Summary collections refreshed.")
+    except PyMongoError as e:
+        print(f"Error refreshing summary collections: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the materialized summary collections")
+    parser.parse_args()
+    refresh_summaries()
@@ -0,0 +1,71 @@
+# mongo_arrow.py
+# Columnar execution of the find/aggregate QUERIES through pymongoarrow: BSON
+# is decoded straight into Arrow columns with a schema derived from the
+# entry's projection, and results can be exported as Parquet. pymongoarrow
+# is optional; ARROW_AVAILABLE tells callers whether this path can be used.
+import io
+from query_runner import query_collection
+from mongodb_queries import QUERIES, TEMPLATES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from pymongoarrow.api import Schema, aggregate_arrow_all, find_arrow_all
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+ARROW_TYPES = {"find", "aggregate"}
+
+def field_types():
+    # Arrow type of every film field a projection can name, raw and canonical
+    return {
+        "title": pa.string(), "Title": pa.string(), "genre": pa.string(), "Director": pa.string(),
+        "Actors": pa.string(), "description": pa.string(), "rating": pa.float64(),
+        "year": pa.int64(), "Votes": pa.int64(), "Metascore": pa.int64(), "Runtime (Minutes)": pa.int64(),
+        "Revenue (Millions)": pa.float64(),
+        "votes": pa.int64(), "metascore": pa.int64(), "runtime": pa.int64(), "revenue": pa.float64(),
+        "director": pa.string(), "genres": pa.list_(pa.string()), "actors": pa.list_(pa.string())
+    }
+
+def schema_for(query_info):
+    # Only an inclusion projection pins the columns; otherwise let pymongoarrow infer them
+    projection = query_info.get("projection")
+    if not projection:
+        return None
+    types = field_types()
+    fields = {field: types[field] for field, included in projection.items() if included and field in types}
+    return Schema(fields) if fields else None
+
+def run_mongo_arrow(collection, query_name: str, limit: int = None, parameters: dict = None, governor=None):
+    query_info = QUERIES[query_name]
+    query = TEMPLATES[query_name].bind(parameters)
+    if query_info["type"] not in ARROW_TYPES:
+        raise ValueError(f"Queries of type {query_info['type']} have no Arrow path")
+    collection = query_collection(collection, query_info)
+    schema = schema_for(query_info)
+    if query_info["type"] == "aggregate":
+        options = governor.mongo_options() if governor else {}
+        if governor:
+            # One row past the cap tells the governor the result was cut
+            query = list(query) + [{"$limit": governor.max_rows + 1}]
+        table = aggregate_arrow_all(collection, query, schema=schema, allowDiskUse=True, **options)
+    else:
+        kwargs = {"projection": query_info["projection"]} if "projection" in query_info else {}
+        if governor:
+            kwargs.update(max_time_ms=governor.max_time_ms, comment=governor.token)
+            limit = min(limit, governor.max_rows + 1) if limit else governor.max_rows + 1
+        if limit:
+            kwargs["limit"] = limit
+        table = find_arrow_all(collection, query, schema=schema, **kwargs)
+    return governor.cap_table(table) if governor else table
+
+def to_parquet_bytes(table):
+    # ObjectId and other BSON extension columns are written as strings
+    for index, field in enumerate(table.schema):
+        if isinstance(field.type, pa.ExtensionType):
+            values = pa.array([None if v is None else str(v) for v in table.column(index).to_pylist()], pa.string())
+            table = table.set_column(index, field.name, values)
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer)
+    return buffer.getvalue()
@@ -1,5 +1,8 @@
 # mongodb_queries.py
 from typing import Union, Dict, List
+from config import CANONICAL_COLLECTION
+from query_templates import Param, compile_queries
+from analytics import correlation_pipeline
 
 MongoQuery = Union[Dict, List[Dict]]
 
@@ -30,6 +33,8 @@ QUERIES = {
     "films_per_year": {
     "description": "Films per year",
     "type": "aggregate",
+    # Every title is pushed, too large to share the overview's single $facet document
+    "facet": False,
     "query": [
         {
             "$group": {
@@ -84,7 +89,8 @@ QUERIES = {
             {"$match": {"count": {"$gt": 5}}},
             # Sort by the number of films in descending order, from highest to lowest
             {"$sort": {"count": -1}},
-        ]
+        ],
+        "page_key": [("count", -1), ("_id", 1)]
     },
     "genre_with_highest_revenue": {
         "description": "Genre with highest revenue",
@@ -154,7 +160,8 @@ QUERIES = {
             {
                 "$sort": {"decade": 1}
             }
-        ]
+        ],
+        "page_key": [("decade", 1)]
     },
     "longest_film_by_genre": {
         "description": "Longest film by genre",
@@ -192,6 +199,8 @@ QUERIES = {
     "high_rating_high_revenue": {
         "description": "Create a MongoDB view that displays only the films with a score greater than 80 (Metascore)",
         "type": "aggregate",
+        # Whole documents, too large to share the overview's single $facet document
+        "facet": False,
         "query": [
             {
                 "$match": {
@@ -214,6 +223,12 @@ QUERIES = {
             "Revenue (Millions)": 1
         }
     },
+    "runtime_revenue_correlation": {
+        "description": "Correlation between film runtime and revenue, computed server-side",
+        # Coefficients, histograms and a bounded sample instead of every pair
+        "type": "aggregate",
+        "query": correlation_pipeline("Runtime (Minutes)", "Revenue (Millions)")
+    },
     "average_runtime_by_decade": {
         "description": "Check if average runtime of films changed by decade",
         "type": "aggregate",
@@ -246,5 +261,106 @@ QUERIES = {
                 "$sort": { "_id": 1 }
             }
         ]
+    },
+
+    # Equivalents on the canonical schema written by normalize.py. Typed fields
+    # and real arrays need no $split/$type guards and can use its indexes.
+    "films_after_1999_canonical": {
+        "description": "Count films released after 1999 (canonical schema)",
+        "type": "count",
+        "collection": CANONICAL_COLLECTION,
+        "query": {"year": {"$gt": 1999}}
+    },
+    "avg_votes_2007_canonical": {
+        "description": "Average votes for 2007 films (canonical schema)",
+        "type": "aggregate",
+        "collection": CANONICAL_COLLECTION,
+        "query": [
+            {"$match": {"year": 2007}},
+            {"$group": {"_id": None, "averageVotes": {"$avg": "$votes"}}}
+        ]
+    },
+    "available_genres_canonical": {
+        "description": "Available genres (canonical schema)",
+        # distinct reads the values straight from the multikey genres index
+        "type": "distinct",
+        "collection": CANONICAL_COLLECTION,
+        "field": "genres",
+        "query": {}
+    },
+    "highest_revenue_film_canonical": {
+        "description": "Film with highest revenue (canonical schema)",
+        "type": "aggregate",
+        "collection": CANONICAL_COLLECTION,
+        "query": [
+            {"$match": {"revenue": {"$ne": None}}},
+            {"$sort": {"revenue": -1}},
+            {"$limit": 1}
+        ]
+    },
+    "directors_with_multiple_films_canonical": {
+        "description": "Directors who have taken part in more than 5 films (canonical schema)",
+        "type": "aggregate",
+        "collection": CANONICAL_COLLECTION,
+        "query": [
+            {"$group": {"_id": "$director", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 5}}},
+            {"$sort": {"count": -1}}
+        ],
+        "page_key": [("count", -1), ("_id", 1)]
+    },
+    "genre_with_highest_revenue_canonical": {
+        "description": "Genre with highest revenue (canonical schema)",
+        "type": "aggregate",
+        "collection": CANONICAL_COLLECTION,
+        "query": [
+            {"$match": {"revenue": {"$ne": None}}},
+            {"$unwind": "$genres"},
+            {"$group": {"_id": "$genres", "totalRevenue": {"$sum": "$revenue"}}},
+            {"$sort": {"totalRevenue": -1}},
+            {"$limit": 1}
+        ]
+    },
+    "longest_film_by_genre_canonical": {
+        "description": "Longest film by genre (canonical schema)",
+        "type": "aggregate",
+        "collection": CANONICAL_COLLECTION,
+        "query": [
+            {"$match": {"runtime": {"$ne": None}}},
+            # Walk the runtime index from the longest film so $first really is the longest
+            {"$sort": {"runtime": -1}},
+            {"$unwind": "$genres"},
+            {
+                "$group": {
+                    "_id": "$genres",
+                    "longest_film": {
+                        "$first": {
+                            "Title": "$title",
+                            "Duration (Minutes)": "$runtime"
+                        }
+                    }
+                }
+            }
+        ]
+    },
+    "films_by_director": {
+        "description": "Films by a director (canonical schema)",
+        "type": "find",
+        "collection": CANONICAL_COLLECTION,
+        "parameters": {"director_name": str},
+        "query": {"director": Param("director_name")},
+        "projection": {"title": 1, "year": 1, "rating": 1, "genres": 1}
+    },
+    "films_by_actor": {
+        "description": "Films starring an actor (canonical schema)",
+        "type": "find",
+        "collection": CANONICAL_COLLECTION,
+        "parameters": {"actor_name": str},
+        # Matches one element of the multikey actors index
+        "query": {"actors": Param("actor_name")},
+        "projection": {"title": 1, "year": 1, "rating": 1, "director": 1}
     }
-}
\ No newline at end of file
+}
+
+# Every query compiled once; TEMPLATES[name].bind(parameters) gives the runnable query
+TEMPLATES = compile_queries(QUERIES)
@@ -1,25 +1,140 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from threading import Lock
 import pymongo
-from neo4j import GraphDatabase
 from tqdm import tqdm
+from bson import json_util
 from pymongo.errors import PyMongoError
-from neo4j.exceptions import Neo4jError
-from config import MONGODB_URI, DB_NAME, DB_COLLECTION, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+from neo4j.exceptions import Neo4jError, TransientError
+from config import SYNC_STATE_FILE
+from connections import get_films_collection, get_canonical_collection, neo4j_session, close_connections
+from data_version import bump_data_version
+from materialize import refresh_summaries, bump_data_version_keeping_summaries, to_object_id
+from normalize import normalize_films
+from communities import detect_communities
+from derivations import derive_relationships
+from graph_labels import LIVE_LABELS, STAGING_LABELS, RETIRED_LABELS, SWAP_MARKER, with_labels, swap_phase
 
-# MongoDB Connection
-client = pymongo.MongoClient(MONGODB_URI)
-db = client[DB_NAME]
-films = db[DB_COLLECTION]
+# Films written per Neo4j transaction by import_data
+DEFAULT_BATCH_SIZE = 500
+# Each parallel worker gets a few _id ranges so a slow range does not stall the pool
+PARTITIONS_PER_WORKER = 4
+# Attempts per batch when a transient error such as a deadlock is raised
+MAX_WRITE_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.5
+# Nodes or relationships removed per transaction by clear_neo4j
+DELETE_BATCH_SIZE = 10000
+# Actors whose CO_STARRED edges are recomputed per transaction
+CO_STARRED_BATCH_SIZE = 200
+# Nodes relabelled per transaction by swap_staging
+SWAP_BATCH_SIZE = 10000
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+def count_graph(session, labels=None):
+    if labels is None:
+        nodes = session.run("MATCH (n) RETURN count(n) AS c").single()["c"]
+        rels = session.run("MATCH ()-[r]->() RETURN count(r) AS c").single()["c"]
+    else:
+        names = list(labels.values())
+        nodes = session.run("MATCH (n) WHERE any(l IN labels(n) WHERE l IN $names) RETURN count(n) AS c",
+                            names=names).single()["c"]
+        rels = session.run("MATCH (n)-[r]-() WHERE any(l IN labels(n) WHERE l IN $names) RETURN count(DISTINCT r) AS c",
+                           names=names).single()["c"]
+    return nodes, rels
+
+def delete_in_batches(session, query, batch_size, progress):
+    # Repeat a bounded delete, one transaction per batch, until nothing is left
+    while True:
+        deleted = session.execute_write(lambda tx: tx.run(query, limit=batch_size).single()["deleted"])
+        progress.update(deleted)
+        if deleted == 0:
+            return
+
+def clear_neo4j(batch_size=DELETE_BATCH_SIZE, labels=None):
+    # Relationships go first so no single DETACH DELETE has to drop a huge
+    # neighbourhood (e.g. a Genre node) in one transaction
+    if labels is None:
+        rel_queries = ["MATCH ()-[r]->() WITH r LIMIT $limit DELETE r RETURN count(r) AS deleted"]
+        node_queries = ["MATCH (n) WITH n LIMIT $limit DELETE n RETURN count(n) AS deleted"]
+    else:
+        rel_queries = [f"MATCH (:{label})-[r]-() WITH DISTINCT r LIMIT $limit DELETE r RETURN count(r) AS deleted"
+                       for label in labels.values()]
+        node_queries = [f"MATCH (n:{label}) WITH n LIMIT $limit DELETE n RETURN count(n) AS deleted"
+                        for label in labels.values()]
 
-def clear_neo4j():
     try:
-        with driver.session() as session:
-            session.run("MATCH (n) DETACH DELETE n")
+        with neo4j_session() as session:
+            nodes, rels = count_graph(session, labels)
+            with tqdm(total=nodes + rels, desc="Clearing Neo4j", unit="entities") as progress:
+                for query in rel_queries + node_queries:
+                    delete_in_batches(session, query, batch_size, progress)
+        if labels is None:
+            bump_data_version_keeping_summaries("clear")
         print("Neo4j database cleared successfully.")
+        return True
     except Neo4jError as e:
         print(f"Error clearing Neo4j database: {e}")
+        return False
+
+def relabel_in_batches(session, source, target, batch_size):
+    query = f"MATCH (n:{source}) WITH n LIMIT $limit REMOVE n:{source} SET n:{target} RETURN count(n) AS relabelled"
+    while session.execute_write(lambda tx: tx.run(query, limit=batch_size).single()["relabelled"]):
+        pass
+
+def swap_staging(session, batch_size=SWAP_BATCH_SIZE):
+    # Bounded transactions retire the live graph, then promote the staging
+    # graph. The GraphSwap marker makes reads wait out the mixed graph and
+    # records the phase, so an interrupted swap resumes where it stopped.
+    phase = swap_phase(session)
+    if phase is None:
+        session.run(f"MERGE (s:{SWAP_MARKER}) SET s.phase = 'retire'").consume()
+        phase = "retire"
+    if phase == "retire":
+        for live, retired in RETIRED_LABELS.items():
+            relabel_in_batches(session, live, retired, batch_size)
+        session.run(f"MATCH (s:{SWAP_MARKER}) SET s.phase = 'promote'").consume()
+    for live, staging in STAGING_LABELS.items():
+        relabel_in_batches(session, staging, live, batch_size)
+    session.run(f"MATCH (s:{SWAP_MARKER}) DELETE s").consume()
 
+def rebuild_neo4j(batch_size=DEFAULT_BATCH_SIZE, report_throughput=False, workers=1, delete_batch_size=DELETE_BATCH_SIZE,
+                  canonical=False):
+    # Blue/green reload: import into staging labels while the live graph keeps
+    # serving reads, swap in batches, then drop the retired graph in batches
+    try:
+        with neo4j_session() as session:
+            resuming = swap_phase(session) is not None
+    except Neo4jError as e:
+        print(f"Error checking for an interrupted swap: {e}")
+        return
+    if resuming:
+        print("Resuming the interrupted swap of the staging graph...")
+    else:
+        if not clear_neo4j(delete_batch_size, labels=STAGING_LABELS):
+            return
+        if import_data(batch_size, report_throughput, workers, labels=STAGING_LABELS, canonical=canonical) is None:
+            print("Rebuild aborted, the live graph was left untouched.")
+            return
+        # Derived relationships and communities are built on the staging graph,
+        # so the live graph never goes without them
+        if not derive_relationships(labels=STAGING_LABELS) or detect_communities(labels=STAGING_LABELS) is None:
+            print("Rebuild aborted, the live graph was left untouched.")
+            return
+    try:
+        with neo4j_session() as session:
+            swap_staging(session)
+    except Neo4jError as e:
+        print(f"Error swapping staging graph, rerun --rebuild to finish the swap: {e}")
+        return
+    print("Staging graph swapped in.")
+    bump_data_version("rebuild")
+    refresh_summaries()
+    clear_neo4j(delete_batch_size, labels=RETIRED_LABELS)
 
 def safe_float(value, default=0.0):
 
@@ -36,8 +151,212 @@ def safe_int(value, default=0):
     except (ValueError, TypeError):
         return default
 
-def import_data():
-    # Create constraints
+def split_names(value):
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+def canonical_row(film):
+    # Documents from normalize.py are already typed, nothing to parse
+    return {
+        "id": str(film["_id"]),
+        "title": film.get("title") or "Unknown",
+        "year": film.get("year") or 0,
+        "votes": film.get("votes") or 0,
+        "revenue": film.get("revenue") or 0.0,
+        "rating": film.get("rating", ""),
+        "metascore": film.get("metascore") or 0,
+        "runtime": film.get("runtime") or 0,
+        "director": film.get("director") or "Unknown",
+        "actors": film.get("actors") or [],
+        "genres": film.get("genres") or []
+    }
+
+def legacy_row(film):
+    return {
+        "id": str(film.get("_id", "")),
+        "title": film.get("title") or film.get("Title", "Unknown"),
+        "year": safe_int(film.get("year")),
+        "votes": safe_int(film.get("Votes")),
+        "revenue": safe_float(film.get("revenue") or film.get("Revenue (Millions)")),
+        "rating": film.get("rating", ""),
+        "metascore": safe_int(film.get("Metascore")),
+        "runtime": safe_int(film.get("runtime_minutes") or film.get("Runtime (Minutes)")),
+        "director": film.get("director") or film.get("Director", "Unknown"),
+        "actors": split_names(film.get("actors") or film.get("Actors", "")),
+        "genres": split_names(film.get("genre") or film.get("Genre", ""))
+    }
+
+def film_row(film):
+    row = canonical_row(film) if isinstance(film.get("genres"), list) else legacy_row(film)
+    # Fingerprint of everything written to the graph, used by sync_data
+    row["source_hash"] = hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode()).hexdigest()
+    return row
+
+def chunked(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+FILM_BATCH_QUERY = """
+    UNWIND $rows AS row
+    MERGE (f:Film {id: row.id})
+    SET f.title = row.title,
+        f.year = row.year,
+        f.votes = row.votes,
+        f.revenue = row.revenue,
+        f.rating = row.rating,
+        f.metascore = row.metascore,
+        f.runtime = row.runtime,
+        f.source_hash = row.source_hash
+"""
+
+NAME_BATCH_QUERIES = {
+    "Director": "UNWIND $names AS name MERGE (:Director {name: name})",
+    "Actor": "UNWIND $names AS name MERGE (:Actor {name: name})",
+    "Genre": "UNWIND $names AS name MERGE (:Genre {name: name})"
+}
+
+DIRECTED_BATCH_QUERY = """
+    UNWIND $pairs AS pair
+    MATCH (d:Director {name: pair.name})
+    MATCH (f:Film {id: pair.id})
+    MERGE (d)-[:DIRECTED]->(f)
+"""
+
+ACTED_IN_BATCH_QUERY = """
+    UNWIND $pairs AS pair
+    MATCH (a:Actor {name: pair.name})
+    MATCH (f:Film {id: pair.id})
+    MERGE (a)-[:ACTED_IN]->(f)
+"""
+
+HAS_GENRE_BATCH_QUERY = """
+    UNWIND $pairs AS pair
+    MATCH (g:Genre {name: pair.name})
+    MATCH (f:Film {id: pair.id})
+    MERGE (f)-[:HAS_GENRE]->(g)
+"""
+
+def write_batch(tx, rows, labels=LIVE_LABELS):
+    # Distinct names per batch so every MERGE on a shared node runs once
+    directors = sorted({row["director"] for row in rows if row["director"]})
+    actors = sorted({actor for row in rows for actor in row["actors"]})
+    genres = sorted({genre for row in rows for genre in row["genres"]})
+
+    tx.run(with_labels(FILM_BATCH_QUERY, labels), rows=rows)
+    tx.run(with_labels(NAME_BATCH_QUERIES["Director"], labels), names=directors)
+    tx.run(with_labels(NAME_BATCH_QUERIES["Actor"], labels), names=actors)
+    tx.run(with_labels(NAME_BATCH_QUERIES["Genre"], labels), names=genres)
+
+    tx.run(with_labels(DIRECTED_BATCH_QUERY, labels), pairs=[{"id": row["id"], "name": row["director"]} for row in rows if row["director"]])
+    tx.run(with_labels(ACTED_IN_BATCH_QUERY, labels), pairs=[{"id": row["id"], "name": actor} for row in rows for actor in row["actors"]])
+    tx.run(with_labels(HAS_GENRE_BATCH_QUERY, labels), pairs=[{"id": row["id"], "name": genre} for row in rows for genre in row["genres"]])
+
+def write_with_retry(session, rows, labels=LIVE_LABELS):
+    # Parallel workers MERGE the same Actor/Genre/Director nodes, so deadlocks
+    # can outlast the driver's own retries; back off and replay the batch
+    for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+        try:
+            return session.execute_write(write_batch, rows, labels)
+        except TransientError as e:
+            if attempt == MAX_WRITE_ATTEMPTS:
+                raise
+            delay = RETRY_BASE_DELAY * 2 ** (attempt - 1) * (1 + random.random())
+            tqdm.write(f"Transient error on batch, retrying in {delay:.1f}s ({attempt}/{MAX_WRITE_ATTEMPTS}): {e.code}")
+            time.sleep(delay)
+
+# CO_STARRED is a precomputed projection of the Actor-Film-Actor paths: one
+# edge per pair of actors, stored from the smaller to the larger name, with the
+# number of shared films. Queries traverse it undirected.
+DROP_CO_STARRED_QUERY = """
+    UNWIND $names AS name
+    MATCH (:Actor {name: name})-[r:CO_STARRED]-()
+    DELETE r
+"""
+
+BUILD_CO_STARRED_QUERY = """
+    UNWIND $names AS name
+    MATCH (a:Actor {name: name})-[:ACTED_IN]->(f:Film)<-[:ACTED_IN]-(b:Actor)
+    WITH a, b, count(DISTINCT f) AS films
+    WITH CASE WHEN a.name < b.name THEN a ELSE b END AS first,
+         CASE WHEN a.name < b.name THEN b ELSE a END AS second, films
+    MERGE (first)-[r:CO_STARRED]->(second)
+    SET r.films = films
+"""
+
+FILM_CAST_QUERY = """
+    UNWIND $ids AS id
+    MATCH (:Film {id: id})<-[:ACTED_IN]-(a:Actor)
+    RETURN DISTINCT a.name AS name
+"""
+
+def refresh_co_starred(tx, names, labels=LIVE_LABELS):
+    # Drop and recompute every CO_STARRED edge touching these actors
+    tx.run(with_labels(DROP_CO_STARRED_QUERY, labels), names=names)
+    tx.run(with_labels(BUILD_CO_STARRED_QUERY, labels), names=names)
+
+FILM_DIRECTORS_QUERY = """
+    UNWIND $ids AS id
+    MATCH (:Film {id: id})<-[:DIRECTED]-(d:Director)
+    RETURN DISTINCT d.name AS name
+"""
+
+def film_cast(tx, ids):
+    return [record["name"] for record in tx.run(FILM_CAST_QUERY, ids=ids)]
+
+def film_directors(tx, ids):
+    return [record["name"] for record in tx.run(FILM_DIRECTORS_QUERY, ids=ids)]
+
+def build_co_starred(batch_size=CO_STARRED_BATCH_SIZE, labels=LIVE_LABELS):
+    try:
+        with neo4j_session() as session:
+            names = [record["name"] for record in
+                     session.run(with_labels("MATCH (a:Actor) RETURN a.name AS name", labels))]
+            with tqdm(total=len(names), desc="Building CO_STARRED", unit="actors") as progress:
+                for batch in chunked(names, batch_size):
+                    session.execute_write(refresh_co_starred, batch, labels)
+                    progress.update(len(batch))
+        return True
+    except Neo4jError as e:
+        print(f"Error building CO_STARRED relationships: {e}")
+        return False
+
+def source_collection(canonical=False):
+    return get_canonical_collection() if canonical else get_films_collection()
+
+def id_ranges(films, partitions):
+    # Split the collection into _id ranges of roughly equal size
+    if partitions <= 1:
+        return [{}]
+    buckets = list(films.aggregate([
+        {"$bucketAuto": {"groupBy": "$_id", "buckets": partitions}}
+    ], allowDiskUse=True))
+    ranges = []
+    for i, bucket in enumerate(buckets):
+        bounds = {"$gte": bucket["_id"]["min"]}
+        # $bucketAuto bounds are exclusive except for the last bucket
+        bounds["$lte" if i == len(buckets) - 1 else "$lt"] = bucket["_id"]["max"]
+        ranges.append({"_id": bounds})
+    return ranges
+
+def import_range(films, id_filter, batch_size, on_batch, labels=LIVE_LABELS):
+    # Each worker owns its Mongo cursor and its Neo4j session
+    imported = 0
+    with neo4j_session() as session:
+        for batch in chunked(films.find(id_filter, batch_size=batch_size), batch_size):
+            rows = [film_row(film) for film in batch]
+            write_with_retry(session, rows, labels)
+            imported += len(rows)
+            on_batch(len(rows))
+    return imported
+
+def create_constraints(labels=LIVE_LABELS):
     constraints = [
         "CREATE CONSTRAINT IF NOT EXISTS FOR (f:Film) REQUIRE f.id IS UNIQUE",
         "CREATE CONSTRAINT IF NOT EXISTS FOR (a:Actor) REQUIRE a.name IS UNIQUE",
@@ -46,89 +365,240 @@ def import_data():
     ]
 
     try:
-        with driver.session() as session:
+        with neo4j_session() as session:
             for constraint in constraints:
-                session.run(constraint)
+                session.run(with_labels(constraint, labels))
+        return True
     except Neo4jError as e:
         print(f"Error creating constraints: {e}")
-        return
+        return False
+
+def add_project_member(labels=LIVE_LABELS):
+    with neo4j_session() as session:
+        session.run(with_labels("""
+            MERGE (you:Actor {name: $name})
+            MERGE (f:Film {title: $title})
+            MERGE (you)-[:ACTED_IN]->(f)
+        """, labels), {
+            "name": "Carlota",
+            "title": "Avatar"
+        })
+        session.execute_write(refresh_co_starred, ["Carlota"], labels)
+
+def import_data(batch_size=DEFAULT_BATCH_SIZE, report_throughput=False, workers=1, labels=LIVE_LABELS,
+                canonical=False):
+    if not create_constraints(labels):
+        return None
+    # Read typed documents from the canonical collection instead of parsing every field here
+    if canonical and not normalize_films():
+        return None
 
-    # Process each film document
+    # Process the films in chunks, one write transaction per chunk. With several
+    # workers each one takes its own _id ranges and all of them feed one bar.
     try:
-        for film in tqdm(films.find(), total=films.count_documents({}), desc="Importing data"):
-
-
-            # Then in your film_data:
-            film_data = {
-                "id": str(film.get("_id", "")),
-                "title": film.get("title") or film.get("Title", "Unknown"),
-                "year": safe_int(film.get("year")),
-                "votes": safe_int(film.get("Votes")),
-                "revenue": safe_float(film.get("revenue") or film.get("Revenue (Millions)")),
-                "rating": film.get("rating", ""),
-                "metascore": safe_int(film.get("Metascore")),
-                "runtime": safe_int(film.get("runtime_minutes") or film.get("Runtime (Minutes)")),
-                "director": film.get("director") or film.get("Director", "Unknown"),
-                "actors": film.get("actors") or film.get("Actors", ""),
-                "genres": film.get("genre") or film.get("Genre", "")
-            }
-            print(f"Processed votes value: {film_data['votes']}")
-            with driver.session() as session:
-                session.run("""
-                    MERGE (f:Film {id: $id})
-                    SET f.title = $title,
-                        f.year = $year,
-                        f.votes = $votes,
-                        f.revenue = $revenue,
-                        f.rating = $rating,
-                        f.metascore = $metascore,
-                        f.runtime = $runtime
-                """, film_data)
-
-                if film_data["director"]:
-                    session.run("""
-                        MERGE (d:Director {name: $director})
-                        MERGE (f:Film {id: $id})
-                        MERGE (d)-[:DIRECTED]->(f)
-                    """, film_data)
-
-                if film_data["actors"]:
-                    actors = [a.strip() for a in film_data["actors"].split(",") if a.strip()]
-                    for actor in actors:
-                        session.run("""
-                            MERGE (a:Actor {name: $actor})
-                            MERGE (f:Film {id: $id})
-                            MERGE (a)-[:ACTED_IN]->(f)
-                        """, {"id": film_data["id"], "actor": actor})
-
-
-                if film_data["genres"]:
-                    genres = [g.strip() for g in film_data["genres"].split(",") if g.strip()]
-                    for genre in genres:
-                        session.run("""
-                            MERGE (g:Genre {name: $genre})
-                            MERGE (f:Film {id: $id})
-                            MERGE (f)-[:HAS_GENRE]->(g)
-                        """, {"id": film_data["id"], "genre": genre})
-
-
-        with driver.session() as session:
-            session.run("""
-                MERGE (you:Actor {name: $name})
-                MERGE (f:Film {title: $title})
-                MERGE (you)-[:ACTED_IN]->(f)
-            """, {
-                "name": "Carlota",
-                "title": "Avatar"
-            })
+        films = source_collection(canonical)
+        total = films.count_documents({})
+        ranges = id_ranges(films, workers * PARTITIONS_PER_WORKER if workers > 1 else 1)
+        started = time.perf_counter()
+        lock = Lock()
 
+        with tqdm(total=total, desc="Importing data", unit="films") as progress:
+            def on_batch(count):
+                with lock:
+                    progress.update(count)
+                    if report_throughput:
+                        progress.set_postfix(rows_per_s=f"{progress.n / (time.perf_counter() - started):.1f}")
+
+            with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+                futures = [pool.submit(import_range, films, id_filter, batch_size, on_batch, labels) for id_filter in ranges]
+                imported = sum(future.result() for future in as_completed(futures))
+
+        add_project_member(labels)
+        if not build_co_starred(labels=labels):
+            return None
+        # A staging import is published by rebuild_neo4j once it is swapped in
+        if labels is LIVE_LABELS:
+            derive_relationships()
+            detect_communities()
+            bump_data_version("import")
+            refresh_summaries()
+
+        elapsed = time.perf_counter() - started
+        if report_throughput:
+            print(f"Imported {imported} films in {elapsed:.1f}s ({imported / elapsed if elapsed else 0:.1f} rows/s)")
         print("Data import completed successfully!")
+        return imported
 
     except (PyMongoError, Neo4jError, ValueError) as e:
         print(f"Error during data import: {e}")
+        return None
+
+FILM_HASHES_QUERY = """
+    UNWIND $ids AS id
+    MATCH (f:Film {id: id})
+    RETURN f.id AS id, f.source_hash AS source_hash
+"""
+
+DETACH_FILMS_QUERY = """
+    UNWIND $ids AS id
+    MATCH (f:Film {id: id})-[r:DIRECTED|ACTED_IN|HAS_GENRE]-()
+    DELETE r
+"""
+
+DELETE_FILMS_QUERY = """
+    UNWIND $ids AS id
+    MATCH (f:Film {id: id})
+    DETACH DELETE f
+"""
+
+DELETE_ORPHANS_QUERY = """
+    MATCH (n)
+    WHERE (n:Actor OR n:Director OR n:Genre) AND NOT (n)--()
+    DELETE n
+"""
+
+def load_sync_state(state_file):
+    if not os.path.exists(state_file):
+        return {}
+    with open(state_file) as f:
+        return json_util.loads(f.read())
+
+def save_sync_state(state_file, state):
+    # Write to a temporary file first so a crash never leaves a torn checkpoint
+    tmp_file = f"{state_file}.tmp"
+    with open(tmp_file, "w") as f:
+        f.write(json_util.dumps(state))
+    os.replace(tmp_file, state_file)
+
+def rewrite_films(tx, rows):
+    # Actors who leave or join a cast both need their CO_STARRED edges redone;
+    # the directors are returned so their derived relationships can be redone
+    ids = [row["id"] for row in rows]
+    actors = set(film_cast(tx, ids)) | {actor for row in rows for actor in row["actors"]}
+    directors = set(film_directors(tx, ids)) | {row["director"] for row in rows if row["director"]}
+    tx.run(DETACH_FILMS_QUERY, ids=ids)
+    write_batch(tx, rows)
+    refresh_co_starred(tx, sorted(actors))
+    return sorted(actors), sorted(directors)
+
+def delete_films(tx, ids):
+    actors = film_cast(tx, ids)
+    directors = film_directors(tx, ids)
+    tx.run(DELETE_FILMS_QUERY, ids=ids)
+    refresh_co_starred(tx, sorted(actors))
+    return sorted(actors), sorted(directors)
+
+def sync_data(batch_size=DEFAULT_BATCH_SIZE, state_file=SYNC_STATE_FILE):
+    # Incremental alternative to clear_neo4j() + import_data(): films are
+    # compared by source_hash and only new or changed ones are rewritten.
+    # The last committed _id is checkpointed so an interrupted run resumes.
+    if not create_constraints():
+        return None
+
+    state = load_sync_state(state_file)
+    if state.get("phase") not in ("upsert", "delete"):
+        state = {"phase": "upsert", "last_id": None, "changed_ids": [], "affected_actors": [], "affected_directors": []}
+    elif state.get("last_id") is not None:
+        print(f"Resuming sync after _id {state['last_id']}")
+
+    try:
+        films = get_films_collection()
+        with neo4j_session() as session:
+            if state["phase"] == "upsert":
+                id_filter = {"_id": {"$gt": state["last_id"]}} if state["last_id"] is not None else {}
+                cursor = films.find(id_filter, batch_size=batch_size).sort("_id", pymongo.ASCENDING)
+                with tqdm(total=films.count_documents(id_filter), desc="Syncing films", unit="films") as progress:
+                    for batch in chunked(cursor, batch_size):
+                        rows = [film_row(film) for film in batch]
+                        stored = {record["id"]: record["source_hash"]
+                                  for record in session.run(FILM_HASHES_QUERY, ids=[row["id"] for row in rows])}
+                        changed = [row for row in rows if stored.get(row["id"]) != row["source_hash"]]
+                        if changed:
+                            actors, directors = session.execute_write(rewrite_films, changed)
+                            state["changed_ids"].extend(row["id"] for row in changed)
+                            state.setdefault("affected_actors", []).extend(actors)
+                            state.setdefault("affected_directors", []).extend(directors)
+
+                        state["last_id"] = batch[-1]["_id"]
+                        save_sync_state(state_file, state)
+                        progress.update(len(batch))
+
+                state["phase"] = "delete"
+                save_sync_state(state_file, state)
+
+            # Films that are in the graph but no longer in MongoDB, checkpointed
+            # before deleting so a resumed run still knows which ids went away
+            if "deleted_ids" not in state:
+                mongo_ids = {str(doc["_id"]) for doc in films.find({}, {"_id": 1})}
+                graph_ids = [record["id"] for record in session.run("MATCH (f:Film) WHERE f.id IS NOT NULL RETURN f.id AS id")]
+                state["deleted_ids"] = [film_id for film_id in graph_ids if film_id not in mongo_ids]
+                state["deleted_count"] = 0
+                save_sync_state(state_file, state)
+            deleted_ids = state["deleted_ids"]
+            for batch in chunked(deleted_ids[state.get("deleted_count", 0):], batch_size):
+                actors, directors = session.execute_write(delete_films, batch)
+                state.setdefault("affected_actors", []).extend(actors)
+                state.setdefault("affected_directors", []).extend(directors)
+                state["deleted_count"] = state.get("deleted_count", 0) + len(batch)
+                save_sync_state(state_file, state)
+            # Directors left without films lose their derived relationships
+            # here, so the orphan cleanup can remove them
+            if state.get("affected_directors") and not derive_relationships(state["affected_directors"]):
+                return None
+            session.run(DELETE_ORPHANS_QUERY).consume()
+
+        add_project_member()
+        if state["changed_ids"] or deleted_ids:
+            bump_data_version("sync")
+            refresh_summaries(state["changed_ids"], deleted_ids)
+            detect_communities(sorted(set(state.get("affected_actors", []))))
+            if get_canonical_collection().estimated_document_count():
+                normalize_films([to_object_id(i) for i in state["changed_ids"]], [to_object_id(i) for i in deleted_ids])
+
+        print(f"Sync completed: {len(state['changed_ids'])} films upserted, {len(deleted_ids)} films removed.")
+        save_sync_state(state_file, {"phase": "done", "last_id": None, "completed_at": datetime.now(timezone.utc)})
+        return {"upserted": state["changed_ids"], "deleted": deleted_ids}
+
+    except (PyMongoError, Neo4jError, ValueError) as e:
+        print(f"Error during sync, rerun to resume from the checkpoint: {e}")
+        return None
 
 if __name__ == "__main__":
-    print("Starting data migration from MongoDB to Neo4j...")
-    clear_neo4j()
-    import_data()
-    driver.close()
+    parser = argparse.ArgumentParser(description="Migrate the films collection from MongoDB to Neo4j")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="films written per Neo4j transaction")
+    parser.add_argument("--throughput", action="store_true",
+                        help="report import throughput in rows per second")
+    parser.add_argument("--sync", action="store_true",
+                        help="incrementally sync changed films instead of clearing and reloading")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="reload into staging labels and swap them in, keeping the graph readable")
+    parser.add_argument("--delete-batch-size", type=int, default=DELETE_BATCH_SIZE,
+                        help="nodes or relationships deleted per transaction when clearing")
+    parser.add_argument("--state-file", default=SYNC_STATE_FILE,
+                        help="checkpoint file used by --sync")
+    parser.add_argument("--canonical", action="store_true",
+                        help="normalize the films first and import from the canonical collection")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="parallel import workers, each with its own _id ranges")
+    parser.add_argument("--co-starred", action="store_true",
+                        help="only recompute the CO_STARRED relationships of the live graph")
+    args = parser.parse_args()
+
+    if args.co_starred:
+        print("Rebuilding CO_STARRED relationships...")
+        if build_co_starred():
+            bump_data_version_keeping_summaries("co_starred")
+    elif args.sync:
+        print("Starting incremental sync from MongoDB to Neo4j...")
+        sync_data(batch_size=args.batch_size, state_file=args.state_file)
+    elif args.rebuild:
+        print("Starting blue/green rebuild from MongoDB to Neo4j...")
+        rebuild_neo4j(batch_size=args.batch_size, report_throughput=args.throughput, workers=args.workers,
+                      delete_batch_size=args.delete_batch_size, canonical=args.canonical)
+    else:
+        print("Starting data migration from MongoDB to Neo4j...")
+        clear_neo4j(args.delete_batch_size)
+        import_data(batch_size=args.batch_size, report_throughput=args.throughput, workers=args.workers,
+                    canonical=args.canonical)
+    close_connections()
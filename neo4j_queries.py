@@ -1,6 +1,7 @@
 QUERIES = {
     "actor_most_films": {
         "description": "Actor with most films",
+        "page_key": [("film_count", -1), ("actor", 1)],
 
         "query": 
             """
@@ -16,11 +17,23 @@ QUERIES = {
         "query": 
             """
             MATCH (a:Actor)-[:ACTED_IN]->(f:Film)<-[:ACTED_IN]-(Anne_Hathaway:Actor {name: 'Anne Hathaway'})
-            RETURN a.name AS actor, f.title AS film
+            RETURN a.name AS actor, f.title AS film, f.id AS film_id
+            """
+    },
+    "actors_starring_with_Anne_Hathaway_co_starred": {
+        "description": "Actors starring with Anne Hathaway (CO_STARRED, shared film count instead of titles)",
+        "page_key": [("shared_films", -1), ("actor", 1)],
+
+        "query":
+            """
+            MATCH (:Actor {name: 'Anne Hathaway'})-[r:CO_STARRED]-(a:Actor)
+            RETURN a.name AS actor, r.films AS shared_films
+            ORDER BY shared_films DESC, actor
             """
     },
     "actor_with_most_revenue": {
         "description": "Actor with most revenue",
+        "page_key": [("total_revenue", -1), ("actor", 1)],
 
         "query": 
             """
@@ -43,6 +56,7 @@ QUERIES = {
     },
     "most_common_genre": {
         "description": "Most common genre",
+        "page_key": [("genre_count", -1), ("genre", 1)],
 
         "query": 
             """
@@ -61,11 +75,22 @@ QUERIES = {
             WHERE a.name = 'Carlota' AND a2.name <> 'Carlota'
             MATCH (a2)-[:ACTED_IN]->(f2:Film)
             WHERE f2.title <> f.title
-            RETURN f2.title AS film, a2.name AS actor
+            RETURN f2.title AS film, f2.id AS film_id, a2.name AS actor
+            """
+    },
+    "films_starring_actors_costar_of_members_of_project_co_starred":  {
+        "description": "Films where co-stars play, having they played with project members in other films (CO_STARRED)",
+
+        "query":
+            """
+            MATCH (a:Actor {name: 'Carlota'})-[r:CO_STARRED]-(a2:Actor)-[:ACTED_IN]->(f2:Film)
+            WHERE r.films > 1 OR NOT (a)-[:ACTED_IN]->(f2)
+            RETURN f2.title AS film, f2.id AS film_id, a2.name AS actor
             """
     },
     "director_worked_with_plus_actors": {
         "description": "Director who has worked with the highest number of actors",
+        "page_key": [("actor_count", -1), ("director", 1)],
 
         "query":
             """
@@ -77,19 +102,34 @@ QUERIES = {
     },
     "most_connected_films": {
         "description": "Most connected films",
+        "page_key": [("connected_actors", -1), ("film", 1), ("film_id", 1)],
 
         "query":
             """
             MATCH (a:Actor)-[:ACTED_IN]->(f:Film)<-[:ACTED_IN]-(a2:Actor)
             MATCH (f2:Film)<-[:ACTED_IN]-(a2)
             WHERE f <> f2
-            RETURN f.title AS film, COUNT(DISTINCT a2) AS connected_actors
+            RETURN f.title AS film, f.id AS film_id, COUNT(DISTINCT a2) AS connected_actors
+            ORDER BY connected_actors DESC
+            LIMIT 1
+            """
+    },
+    "most_connected_films_by_degree": {
+        "description": "Most connected films, counted from ACTED_IN degrees instead of co-star paths",
+        "page_key": [("connected_actors", -1), ("film", 1), ("film_id", 1)],
+
+        "query":
+            """
+            MATCH (f:Film)<-[:ACTED_IN]-(a2:Actor)
+            WHERE COUNT { (a2)-[:ACTED_IN]->(:Film) } > 1 AND COUNT { (f)<-[:ACTED_IN]-(:Actor) } > 1
+            RETURN f.title AS film, f.id AS film_id, COUNT(a2) AS connected_actors
             ORDER BY connected_actors DESC
             LIMIT 1
             """
     },
     "most_prolific_actors": {
         "description": "Actors who have played with the most directors",
+        "page_key": [("directors_count", -1), ("actor", 1)],
 
         "query":
             """
@@ -101,29 +141,31 @@ QUERIES = {
     },
     "recommended_film_for_actor": {
         "description": "Recommended film for an actor based on genres",
+        "page_key": [("recommended_film", 1), ("film_id", 1), ("actor", 1)],
 
         "query":
             """
             MATCH (a:Actor)-[:ACTED_IN]->(f:Film)-[:HAS_GENRE]->(g:Genre)<-[:HAS_GENRE]-(f2:Film)<-[:ACTED_IN]-(a2:Actor)
             WHERE a <> a2
-            RETURN DISTINCT f2.title AS recommended_film, a.name AS actor
+            RETURN DISTINCT f2.title AS recommended_film, f2.id AS film_id, a.name AS actor
             ORDER BY f2.title
             LIMIT 1
             """
     },
     "relation_influenced_by": {
         "description": "Influence relation between directors based on genres",
+        # Stored by derivations.py after every import or sync
 
         "query":
             """
-            MATCH (r1:Director)-[:DIRECTED]->(f:Film)-[:HAS_GENRE]->(g:Genre)<-[:HAS_GENRE]-(f2:Film)<-[:DIRECTED]-(r2:Director)
-            WHERE r1 <> r2 AND f <> f2
-            MERGE (r1)-[:INFLUENCED_BY {genre: g.name}]->(r2)
-            RETURN DISTINCT r1.name AS director1, r2.name AS director2, g.name AS genre
+            MATCH (r1:Director)-[i:INFLUENCED_BY]->(r2:Director)
+            RETURN r1.name AS director1, r2.name AS director2, i.genre AS genre
             """
     },
     "shortest_path_between_actors": {
         "description": "Shortest path between two actors",
+        # A single path, and paths cannot be ordered for keyset pagination
+        "paginate": False,
         "query":
             """
             MATCH p = shortestPath(
@@ -133,26 +175,14 @@ QUERIES = {
     },
     "analyse_actors_communities": {
         "description": "Analyse actors communities",
-        "query1":
-            """
-            CALL gds.graph.project(
-            'actors_graph',
-            ['Actor', 'Film'],
-            {
-                ACTED_IN: {
-                orientation: 'UNDIRECTED'
-                }
-            });
-            """,
-        "query2":
-            """
-            CALL gds.louvain.write('actors_graph', { writeProperty: 'community' });
-            """,
-        "query3":
+        "page_key": [("community", 1), ("actor", 1)],
+        # Communities are written by communities.py, no GDS plugin needed
+        "query":
             """
             MATCH (a:Actor)
+            WHERE a.community IS NOT NULL
             RETURN a.name AS actor, a.community AS community
-            ORDER BY a.community;
+            ORDER BY community, actor
             """
     },
 
@@ -164,33 +194,35 @@ QUERIES = {
             MATCH (f1:Film)-[:HAS_GENRE]->(g:Genre)<-[:HAS_GENRE]-(f2:Film)
             MATCH (f1:Film)<-[:DIRECTED]-(d1:Director), (f2:Film)<-[:DIRECTED]-(d2:Director)
             WHERE d1 <> d2 AND f1 <> f2
-            RETURN DISTINCT f1.title AS film1, f2.title AS film2, g.name AS genre, d1.name AS director1, d2.name AS director2
+            RETURN DISTINCT f1.title AS film1, f1.id AS film1_id, f2.title AS film2, f2.id AS film2_id, g.name AS genre, d1.name AS director1, d2.name AS director2
             """
     },
     "recommended_films_based_on_actor": {
         "description": "Recommended films based on actor",
+        "page_key": [("film", 1), ("film_id", 1)],
 
         "query":
             """
             MATCH (a:Actor {name: $actorName})-[:ACTED_IN]->(f:Film)
-            RETURN DISTINCT f.title 
-            ORDER BY f.title
+            RETURN DISTINCT f.title AS film, f.id AS film_id
+            ORDER BY film
             """
     },
     "directors_similar_films_per_year": {
         "description": "Directors who produced similar films per year",
+        "page_key": [("year", -1), ("director1", 1), ("director2", 1), ("genre", 1)],
+        # Stored by derivations.py after every import or sync
 
         "query":
             """
-            MATCH (d:Director)-[:DIRECTED]->(f:Film)-[:HAS_GENRE]->(g:Genre)<-[:HAS_GENRE]-(f2:Film)<-[:DIRECTED]-(d2:Director)
-            WHERE d <> d2 AND f.year = f2.year
-            MERGE (d)-[:COMPETES_WITH {year: f.year, genre: g.name}]->(d2)
-            RETURN d.name AS director1, d2.name AS director2, f.year AS year, g.name AS genre
+            MATCH (d:Director)-[c:COMPETES_WITH]->(d2:Director)
+            RETURN d.name AS director1, d2.name AS director2, c.year AS year, c.genre AS genre
             ORDER BY year DESC;
             """
     },
     "collaborations_for_votes_or_revenue": {
         "description": "Collaborations between actors and directors based on revenue or votes",
+        "page_key": [("max_metric", -1), ("director", 1), ("actor", 1), ("film_id", 1)],
 
         "query":
             """
@@ -203,7 +235,7 @@ QUERIES = {
                 ELSE AVG(f.votes)
             END AS max_metric
             ORDER BY max_metric DESC
-            RETURN d.name AS director, a.name AS actor, f.title, avg_revenue, avg_votes, max_metric
+            RETURN d.name AS director, a.name AS actor, f.title AS film, f.id AS film_id, avg_revenue, avg_votes, max_metric
             LIMIT 10
             """
     },
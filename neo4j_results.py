@@ -0,0 +1,41 @@
+# neo4j_results.py
+# Turns a streamed Neo4j result straight into a DataFrame, one column buffer
+# per result key, without building a dict per record first. Paths are
+# flattened into compact node and relationship tables.
+import pandas as pd
+from neo4j.graph import Node, Path, Relationship
+
+def node_name(node):
+    return node.get("name") or node.get("title") or node.get("id") or node.element_id
+
+def add_path(row, column, path, nodes, relationships):
+    for position, node in enumerate(path.nodes):
+        nodes.append({"row": row, "column": column, "position": position,
+                      "label": next(iter(node.labels), None), "name": node_name(node), "id": node.get("id")})
+    for position, relationship in enumerate(path.relationships):
+        relationships.append({"row": row, "column": column, "position": position, "type": relationship.type,
+                              "start": node_name(relationship.start_node), "end": node_name(relationship.end_node)})
+
+def compact_value(value):
+    if isinstance(value, Node):
+        return dict(value)
+    if isinstance(value, Relationship):
+        return value.type
+    return value
+
+# Returns (frame, paths) where paths is None or {"nodes": frame, "relationships": frame}.
+# With a QueryGovernor, reading stops at its row and memory caps.
+def result_to_frames(result, governor=None):
+    keys = list(result.keys())
+    columns = [[] for _ in keys]
+    nodes, relationships = [], []
+    records = governor.neo4j_records(result) if governor else result
+    for row, record in enumerate(records):
+        for index, value in enumerate(record.values()):
+            if isinstance(value, Path):
+                add_path(row, keys[index], value, nodes, relationships)
+                value = " -> ".join(str(node_name(node)) for node in value.nodes)
+            columns[index].append(compact_value(value))
+    frame = pd.DataFrame(dict(zip(keys, columns)), columns=keys)
+    paths = {"nodes": pd.DataFrame(nodes), "relationships": pd.DataFrame(relationships)} if nodes else None
+    return frame, paths
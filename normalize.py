@@ -0,0 +1,95 @@
+# normalize.py
+# Rewrites the films collection into CANONICAL_COLLECTION with one field name
+# per attribute, typed numbers and real arrays for genres and actors. The whole
+# rewrite runs server-side as a single $merge aggregation.
+import argparse
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+from config import CANONICAL_COLLECTION
+from connections import get_canonical_collection, get_films_collection
+from materialize import bump_data_version_keeping_summaries
+
+# Multikey indexes on the arrays plus the scalar fields the canonical QUERIES use
+CANONICAL_INDEXES = [
+    [("genres", ASCENDING)],
+    [("actors", ASCENDING)],
+    [("director", ASCENDING)],
+    [("year", ASCENDING)],
+    [("revenue", DESCENDING)],
+    [("runtime", DESCENDING)]
+]
+
+def first_of(*fields):
+    return {"$ifNull": [f"${field}" for field in fields] + [None]}
+
+def to_number(expr, to):
+    # "1,234", 1234 and 1234.0 all become numbers; "N/A" and "" become null
+    as_double = {"$convert": {
+        "input": {"$replaceAll": {"input": {"$toString": expr}, "find": ",", "replacement": ""}},
+        "to": "double", "onError": None, "onNull": None
+    }}
+    if to == "double":
+        return as_double
+    return {"$convert": {"input": as_double, "to": to, "onError": None, "onNull": None}}
+
+def to_list(expr):
+    # Comma-separated strings become trimmed arrays; arrays are kept as they are
+    return {"$cond": [
+        {"$isArray": expr},
+        expr,
+        {"$filter": {
+            "input": {"$map": {
+                "input": {"$split": [{"$ifNull": [expr, ""]}, ","]},
+                "as": "value",
+                "in": {"$trim": {"input": "$$value"}}
+            }},
+            "as": "value",
+            "cond": {"$ne": ["$$value", ""]}
+        }}
+    ]}
+
+CANONICAL_PROJECTION = {
+    "title": {"$ifNull": ["$title", "$Title", "Unknown"]},
+    "year": to_number(first_of("year", "Year"), "int"),
+    "rating": first_of("rating", "Rating"),
+    "votes": to_number(first_of("Votes", "votes"), "int"),
+    "revenue": to_number(first_of("revenue", "Revenue (Millions)"), "double"),
+    "metascore": to_number(first_of("Metascore", "metascore"), "int"),
+    "runtime": to_number(first_of("runtime_minutes", "Runtime (Minutes)"), "int"),
+    "director": {"$trim": {"input": {"$ifNull": ["$director", "$Director", "Unknown"]}}},
+    "genres": to_list(first_of("genre", "Genre")),
+    "actors": to_list(first_of("actors", "Actors"))
+}
+
+def normalize_pipeline(ids=None):
+    pipeline = [{"$match": {"_id": {"$in": list(ids)}}}] if ids is not None else []
+    return pipeline + [
+        {"$project": CANONICAL_PROJECTION},
+        {"$merge": {"into": CANONICAL_COLLECTION, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+
+def create_canonical_indexes():
+    canonical = get_canonical_collection()
+    for keys in CANONICAL_INDEXES:
+        canonical.create_index(keys)
+
+def normalize_films(ids=None, deleted_ids=None):
+    # With no ids the whole collection is rewritten, otherwise only those films
+    try:
+        get_films_collection().aggregate(normalize_pipeline(ids), allowDiskUse=True)
+        if deleted_ids:
+            get_canonical_collection().delete_many({"_id": {"$in": list(deleted_ids)}})
+        create_canonical_indexes()
+        print(f"Films normalized into {CANONICAL_COLLECTION}.")
+        return True
+    except PyMongoError as e:
+        print(f"Error normalizing films: {e}")
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Rewrite the films collection into {CANONICAL_COLLECTION}")
+    parser.parse_args()
+    # Cached results of the canonical queries are keyed on the data version;
+    # the summaries read the films collection and stay valid
+    if normalize_films():
+        bump_data_version_keeping_summaries("normalize")
@@ -0,0 +1,106 @@
+# overview.py
+# Runs every compatible no-parameter QUERIES entry of a collection as one
+# $facet aggregation, so the collection is scanned once instead of once per
+# query, then splits the facets back into the results run_mongo_query would
+# return. Entries opt out with "facet": False when their output is too large
+# for the single 16 MB document a $facet returns.
+import argparse
+from pymongo.errors import PyMongoError
+from connections import get_films_collection, close_connections
+from mongodb_queries import QUERIES
+from query_runner import run_mongo_query, query_collection
+from benchmark import timed, mongo_server_metrics
+
+# Stages a $facet sub-pipeline cannot contain
+FACET_FORBIDDEN_STAGES = {"$collStats", "$facet", "$geoNear", "$indexStats", "$out", "$merge", "$planCacheStats",
+                          "$search", "$searchMeta", "$changeStream", "$currentOp", "$listSessions", "$documents"}
+
+def facet_pipeline(query_info):
+    # The entry as a $facet sub-pipeline, or None when it cannot be combined
+    if query_info.get("parameters") or not query_info.get("facet", True):
+        return None
+    query = query_info["query"]
+    if query_info["type"] == "aggregate":
+        if any(stage_name in FACET_FORBIDDEN_STAGES for stage in query for stage_name in stage):
+            return None
+        return list(query)
+    if query_info["type"] == "count":
+        return [{"$match": query}, {"$count": "count"}]
+    if query_info["type"] == "distinct":
+        # distinct() also flattens arrays and skips missing values
+        field = query_info["field"]
+        return [{"$match": query}, {"$unwind": f"${field}"}, {"$group": {"_id": f"${field}"}}, {"$sort": {"_id": 1}}]
+    return None
+
+def overview_groups():
+    # Compatible entries grouped by the collection they scan (None: the films collection)
+    groups = {}
+    for name, query_info in QUERIES.items():
+        if facet_pipeline(query_info) is not None:
+            groups.setdefault(query_info.get("collection"), []).append(name)
+    return groups
+
+def overview_pipeline(names):
+    return [{"$facet": {name: facet_pipeline(QUERIES[name]) for name in names}}]
+
+def split_results(document, names):
+    # Each facet back into the shape run_mongo_query returns for its type
+    results = {}
+    for name in names:
+        query_info = QUERIES[name]
+        rows = document.get(name, [])
+        if query_info["type"] == "count":
+            results[name] = rows[0]["count"] if rows else 0
+        elif query_info["type"] == "distinct":
+            results[name] = [{query_info["field"]: row["_id"]} for row in rows]
+        else:
+            results[name] = rows
+    return results
+
+def run_overview(collection, governor=None):
+    # {query name: result} for every compatible entry, one aggregation per collection
+    options = governor.mongo_options() if governor else {}
+    collect = governor.collect_mongo if governor else list
+    results = {}
+    for target, names in overview_groups().items():
+        target_collection = query_collection(collection, {"collection": target} if target else {})
+        documents = collect(target_collection.aggregate(overview_pipeline(names), allowDiskUse=True, **options))
+        results.update(split_results(documents[0] if documents else {}, names))
+    return results
+
+def measure_overview(collection, runs=3):
+    # Best-of-runs latency and documents examined, combined vs one query at a time
+    report = {"combined_ms": 0.0, "individual_ms": 0.0, "combined_docs": 0, "individual_docs": 0, "queries": {}}
+    for target, names in overview_groups().items():
+        overview_info = {"type": "aggregate", "query": overview_pipeline(names)}
+        if target:
+            overview_info["collection"] = target
+        target_collection = query_collection(collection, overview_info)
+        report["combined_ms"] += min(timed(lambda: list(target_collection.aggregate(overview_info["query"], allowDiskUse=True)))[0]
+                                     for _ in range(runs))
+        report["combined_docs"] += mongo_server_metrics(collection, overview_info)["docs_examined"]
+        for name in names:
+            elapsed = min(timed(lambda: run_mongo_query(collection, name, use_summaries=False))[0] for _ in range(runs))
+            docs = mongo_server_metrics(collection, QUERIES[name])["docs_examined"]
+            report["queries"][name] = {"ms": elapsed, "docs_examined": docs}
+            report["individual_ms"] += elapsed
+            report["individual_docs"] += docs
+    report["saved_ms"] = report["individual_ms"] - report["combined_ms"]
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the single-pass $facet overview with one query at a time")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="runs per measurement, the fastest one is kept")
+    args = parser.parse_args()
+
+    try:
+        report = measure_overview(get_films_collection(), args.runs)
+        for name, metrics in report["queries"].items():
+            print(f"{name}: {metrics['ms']:.1f} ms, {metrics['docs_examined']} docs examined")
+        print(f"One by one: {report['individual_ms']:.1f} ms, {report['individual_docs']} docs examined")
+        print(f"Overview:   {report['combined_ms']:.1f} ms, {report['combined_docs']} docs examined")
+        print(f"Saved:      {report['saved_ms']:.1f} ms")
+    except PyMongoError as e:
+        print(f"Error measuring the overview: {e}")
+    close_connections()
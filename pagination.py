@@ -0,0 +1,121 @@
+# pagination.py
+# Keyset pagination for the predefined queries: each page is "rows after the
+# last key of the previous page, in key order", fetched through a cursor that
+# never holds more than one page. Queries can declare a "page_key" as a list
+# of (field, direction) pairs; the last field must make the key unique.
+import re
+from neo4j.exceptions import Neo4jError
+from config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from connections import neo4j_session
+from mongodb_queries import QUERIES, TEMPLATES
+from neo4j_results import result_to_frames
+from cypher_prepare import CYPHER_PREPARER, prepare_cypher, is_syntax_error
+from graph_labels import ensure_graph_ready
+from materialize import summary_is_fresh, summary_collection_name, read_pipeline
+from neo4j_queries import QUERIES as NEO4J_QUERIES
+from query_runner import query_collection, neo4j_parameters
+
+# Query types that return rows; counts are a single number
+PAGINATED_TYPES = {"aggregate", "find"}
+
+def page_limit(page_size):
+    return max(1, min(page_size or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+def mongo_keyset_filter(page_key, after):
+    # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., with < for descending fields
+    clauses = []
+    for i, (field, direction) in enumerate(page_key):
+        clause = {prev_field: after[j] for j, (prev_field, _) in enumerate(page_key[:i])}
+        clause[field] = {"$gt" if direction > 0 else "$lt": after[i]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+def mongo_page(collection, query_name, after=None, page_size=DEFAULT_PAGE_SIZE, parameters=None, governor=None):
+    # Returns (rows, key of the last row or None when this is the last page).
+    # A QueryGovernor adds maxTimeMS and its cancel token.
+    query_info = QUERIES[query_name]
+    query = TEMPLATES[query_name].bind(parameters)
+    collection = query_collection(collection, query_info)
+    page_key = query_info.get("page_key", [("_id", 1)])
+    limit = page_limit(page_size)
+    sort = dict(page_key)
+
+    if query_info["type"] == "aggregate":
+        pipeline = list(query)
+        # A fresh summary returns the same rows, so page over it instead
+        if summary_is_fresh(collection.database, query_name):
+            collection = collection.database[summary_collection_name(query_name)]
+            pipeline = list(read_pipeline(query_name))
+        if after is not None:
+            pipeline.append({"$match": mongo_keyset_filter(page_key, after)})
+        pipeline += [{"$sort": sort}, {"$limit": limit + 1}]
+        options = governor.mongo_options() if governor else {}
+        cursor = collection.aggregate(pipeline, batchSize=limit + 1, **options)
+    elif query_info["type"] == "find":
+        if after is not None:
+            query = {"$and": [query, mongo_keyset_filter(page_key, after)]}
+        projection = dict(query_info.get("projection") or {}) or None
+        if projection is not None:
+            # The key fields have to come back to build the next cursor
+            projection.update({field: 1 for field, _ in page_key})
+        options = {"max_time_ms": governor.max_time_ms, "comment": governor.token} if governor else {}
+        cursor = collection.find(query, projection, sort=list(page_key), limit=limit + 1, batch_size=limit + 1,
+                                 **options)
+    else:
+        raise ValueError(f"Queries of type {query_info['type']} are not paginated")
+
+    rows = list(cursor)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_after = tuple(rows[-1].get(field) for field, _ in page_key) if has_more else None
+    return rows, next_after
+
+def neo4j_columns(session, query, parameters):
+    # EXPLAIN returns the result columns without running the query
+    return session.run(f"EXPLAIN {query}", parameters).keys()
+
+def neo4j_page(query_name, parameters=None, after=None, page_size=DEFAULT_PAGE_SIZE, governor=None):
+    query_info = NEO4J_QUERIES[query_name]
+    query, cypher_parameters = prepare_cypher(query_info["query"], neo4j_parameters(query_name, parameters))
+    limit = page_limit(page_size)
+
+    with neo4j_session(fetch_size=limit + 1) as session:
+        ensure_graph_ready(session)
+        try:
+            columns = neo4j_columns(session, query, cypher_parameters)
+        except Neo4jError as e:
+            # A shape the server cannot parse is paged as the raw text
+            if not is_syntax_error(e):
+                raise
+            query, cypher_parameters = CYPHER_PREPARER.keep_literals(query_info["query"],
+                                                                     neo4j_parameters(query_name, parameters))
+            columns = neo4j_columns(session, query, cypher_parameters)
+        # CALL { } only accepts aliased RETURN items, e.g. "f.title AS film"
+        unaliased = [column for column in columns if not re.fullmatch(r"\w+", column)]
+        if unaliased:
+            raise ValueError(f"Cannot page {query_name}, alias its columns with AS: {', '.join(unaliased)}")
+        page_key = query_info.get("page_key") or [(column, 1) for column in columns]
+        names = [f"`{field}`" for field, _ in page_key]
+
+        where = ""
+        if after is not None:
+            clauses = []
+            for i, (name, (_, direction)) in enumerate(zip(names, page_key)):
+                equal = [f"{names[j]} = $page_after{j}" for j in range(i)]
+                clauses.append("(" + " AND ".join(equal + [f"{name} {'>' if direction > 0 else '<'} $page_after{i}"]) + ")")
+            where = "WHERE " + " OR ".join(clauses)
+            cypher_parameters.update({f"page_after{i}": value for i, value in enumerate(after)})
+
+        order = ", ".join(f"{name} {'ASC' if direction > 0 else 'DESC'}" for name, (_, direction) in zip(names, page_key))
+        paged = (f"CALL {{ {query} }} WITH * {where} "
+                 f"RETURN {', '.join(f'`{column}`' for column in columns)} ORDER BY {order} LIMIT $page_limit")
+        cypher_parameters["page_limit"] = limit + 1
+        # A QueryGovernor adds its transaction timeout and cancel token
+        frame, _ = result_to_frames(session.run(governor.neo4j_query(paged) if governor else paged, cypher_parameters))
+
+    has_more = len(frame) > limit
+    frame = frame.iloc[:limit]
+    # Numpy scalars from the frame go back to plain Python values for the driver
+    next_after = tuple(getattr(value, "item", lambda: value)() for value in
+                       (frame.iloc[-1][field] for field, _ in page_key)) if has_more else None
+    return frame, next_after
@@ -0,0 +1,81 @@
+# query_cache.py
+# In-process TTL + LRU cache for predefined query results, bounded by an
+# estimate of the memory the cached results use.
+import pickle
+import sys
+import time
+from collections import OrderedDict
+from threading import Lock
+import pandas as pd
+from config import RESULT_CACHE_TTL, RESULT_CACHE_MAX_BYTES
+
+def estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return sys.getsizeof(value)
+
+def make_key(engine, query_name, parameters=None, data_version=None):
+    params = tuple(sorted((k, repr(v)) for k, v in (parameters or {}).items()))
+    return (engine, query_name, params, data_version)
+
+class QueryCache:
+    def __init__(self, ttl=RESULT_CACHE_TTL, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._data_version = None
+        self._lock = Lock()
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _check_version(self, data_version):
+        # A new data version makes every older entry unreachable, free them now
+        if data_version != self._data_version:
+            for key in [k for k in self._entries if k[-1] != data_version]:
+                self._drop(key)
+            self._data_version = data_version
+
+    # Returns (value, age in seconds) or None on a miss
+    def get(self, key):
+        with self._lock:
+            self._check_version(key[-1])
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = time.time() - entry[0]
+            if age > self.ttl:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2], age
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._check_version(key[-1])
+            if key in self._entries:
+                self._drop(key)
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+            self._entries[key] = (time.time(), size, value)
+            self._bytes += size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+# Shared by every Streamlit session of the server process
+RESULT_CACHE = QueryCache()
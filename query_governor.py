@@ -0,0 +1,154 @@
+# query_governor.py
+# Time, row and memory limits for queries started from app.py, plus the
+# server-side cancellation of a running query. Every governed query carries a
+# token (MongoDB "comment", Neo4j transaction metadata) so it can be found and
+# killed from another Streamlit run.
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import bson
+from neo4j import Query
+from neo4j.graph import Entity, Path
+from pymongo.command_cursor import CommandCursor
+from pymongo.cursor import Cursor
+from pymongo.errors import ExecutionTimeout, OperationFailure
+from config import QUERY_MAX_TIME_MS, QUERY_MAX_ROWS, QUERY_MAX_BYTES, DASHBOARD_WORKERS
+from connections import get_mongo_client, neo4j_session
+
+# Governed queries run here so the script thread stays free to handle a cancel click
+GOVERNOR_POOL = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS)
+
+def deep_size(value):
+    # sys.getsizeof counts a container but not what it holds
+    size = sys.getsizeof(value)
+    if isinstance(value, (dict, Entity)):
+        size += sum(deep_size(key) + deep_size(item) for key, item in value.items())
+    elif isinstance(value, Path):
+        size += sum(deep_size(node) for node in value.nodes) + sum(deep_size(rel) for rel in value.relationships)
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(deep_size(item) for item in value)
+    return size
+
+class QueryGovernor:
+    def __init__(self, max_time_ms=QUERY_MAX_TIME_MS, max_rows=QUERY_MAX_ROWS, max_bytes=QUERY_MAX_BYTES):
+        self.max_time_ms = max_time_ms
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.token = uuid.uuid4().hex
+        # Reason the result was cut short, None when it is complete
+        self.truncated = None
+
+    def mongo_options(self):
+        return {"maxTimeMS": self.max_time_ms, "comment": self.token}
+
+    def neo4j_query(self, text):
+        return Query(text, timeout=self.max_time_ms / 1000, metadata={"governor_token": self.token})
+
+    def capped(self, rows, size_of):
+        # Stop pulling rows once the row or memory cap is reached
+        used = 0
+        for count, row in enumerate(rows):
+            if count >= self.max_rows:
+                self.truncated = f"row limit of {self.max_rows} reached"
+                return
+            used += size_of(row)
+            if used > self.max_bytes:
+                self.truncated = f"memory limit of {self.max_bytes // (1024 * 1024)} MB reached"
+                return
+            yield row
+
+    def collect_mongo(self, cursor):
+        try:
+            return list(self.capped(cursor, lambda doc: len(bson.encode(doc))))
+        finally:
+            cursor.close()
+
+    def neo4j_records(self, result):
+        return self.capped(result, lambda record: sum(deep_size(value) for value in record.values()))
+
+    def cap_table(self, table):
+        # Arrow results arrive whole, so the caps are applied to the table;
+        # callers fetch at most max_rows + 1 rows to keep it bounded
+        if table.num_rows > self.max_rows:
+            self.truncated = f"row limit of {self.max_rows} reached"
+            table = table.slice(0, self.max_rows)
+        if table.nbytes > self.max_bytes:
+            self.truncated = f"memory limit of {self.max_bytes // (1024 * 1024)} MB reached"
+            table = table.slice(0, table.num_rows * self.max_bytes // table.nbytes)
+        return table
+
+def cancel_mongo(token):
+    client = get_mongo_client()
+    operations = client.admin.aggregate([{"$currentOp": {}}, {"$match": {"command.comment": token}}])
+    killed = 0
+    for operation in operations:
+        client.admin.command("killOp", op=operation["opid"])
+        killed += 1
+    return killed
+
+def cancel_neo4j(token):
+    with neo4j_session() as session:
+        ids = [record["transactionId"] for record in session.run(
+            "SHOW TRANSACTIONS YIELD transactionId, metaData WHERE metaData.governor_token = $token "
+            "RETURN transactionId", token=token)]
+        if ids:
+            session.run("TERMINATE TRANSACTIONS $ids", ids=ids).consume()
+    return len(ids)
+
+def cancel(engine, token):
+    return cancel_mongo(token) if engine == "mongo" else cancel_neo4j(token)
+
+class GovernedCollection:
+    # Stands in for the collection in the custom MQL box: the common read
+    # methods get the governor's time limit and token, cursors get its caps
+    def __init__(self, collection, governor):
+        self._collection = collection
+        self._governor = governor
+
+    def find(self, *args, **kwargs):
+        kwargs.setdefault("max_time_ms", self._governor.max_time_ms)
+        kwargs.setdefault("comment", self._governor.token)
+        return self._collection.find(*args, **kwargs)
+
+    def find_one(self, *args, **kwargs):
+        kwargs.setdefault("max_time_ms", self._governor.max_time_ms)
+        kwargs.setdefault("comment", self._governor.token)
+        return self._collection.find_one(*args, **kwargs)
+
+    def aggregate(self, pipeline, **kwargs):
+        return self._collection.aggregate(pipeline, **{**self._governor.mongo_options(), **kwargs})
+
+    def count_documents(self, filter, **kwargs):
+        return self._collection.count_documents(filter, **{**self._governor.mongo_options(), **kwargs})
+
+    def distinct(self, key, filter=None, **kwargs):
+        return self._collection.distinct(key, filter, **{**self._governor.mongo_options(), **kwargs})
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+def stop_reason(error, governor):
+    # A readable reason when the server stopped the query, None for other errors.
+    # pymongo codes are ints (50 MaxTimeMSExpired, 11601 Interrupted, 11602
+    # InterruptedDueToReplStateChange), Neo4j codes are status strings.
+    if isinstance(error, ExecutionTimeout):
+        return f"time limit of {governor.max_time_ms / 1000:.0f}s exceeded"
+    if isinstance(error, OperationFailure):
+        if error.code == 50:
+            return f"time limit of {governor.max_time_ms / 1000:.0f}s exceeded"
+        if error.code in (11601, 11602):
+            return "cancelled"
+        return None
+    code = getattr(error, "code", None)
+    if isinstance(code, str):
+        if "TimedOut" in code:
+            return f"time limit of {governor.max_time_ms / 1000:.0f}s exceeded"
+        if "Terminated" in code:
+            return "cancelled"
+    return None
+
+def materialize_mongo_result(result, governor):
+    # Cursors returned by a custom query are drained under the caps
+    if isinstance(result, (Cursor, CommandCursor)):
+        return governor.collect_mongo(result)
+    return result
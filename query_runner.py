@@ -0,0 +1,88 @@
+# query_runner.py
+# Runs the catalogued queries without any UI code, shared by app.py and the
+# command-line tools (benchmark.py, ...).
+from config import NEO4J_FETCH_SIZE, CANONICAL_COLLECTION
+from connections import neo4j_session
+from neo4j_results import result_to_frames
+from cypher_prepare import run_prepared
+from graph_labels import ensure_graph_ready
+from materialize import summary_is_fresh, read_summary
+from mongodb_queries import QUERIES, TEMPLATES
+from neo4j_queries import QUERIES as NEO4J_QUERIES
+
+# Representative inputs for the parameterized queries, in the app's input names,
+# used wherever the catalogue runs unattended (benchmark, dashboard)
+EXAMPLE_PARAMETERS = {
+    "films_by_director": {"director_name": "Christopher Nolan"},
+    "films_by_actor": {"actor_name": "Christian Bale"},
+    "recommended_films_based_on_actor": {"actor_name": "Anne Hathaway"},
+    "shortest_path_between_actors": {"actor_name1": "Anne Hathaway", "actor_name2": "Christian Bale"}
+}
+
+def query_collection(collection, query_info):
+    # Some entries target another collection, e.g. the canonical schema
+    if "collection" in query_info:
+        target = collection.database[query_info["collection"]]
+        # The canonical collection is only filled by normalize.py; say so
+        # instead of returning an empty result
+        if query_info["collection"] == CANONICAL_COLLECTION and not target.estimated_document_count():
+            raise ValueError(f"{CANONICAL_COLLECTION} is empty, run normalize.py first")
+        return target
+    return collection
+
+def run_mongo_query(collection, query_name: str, limit: int = None, parameters: dict = None, use_summaries: bool = True,
+                    governor=None):
+    if query_name not in QUERIES:
+        raise ValueError(f"Unknown query: {query_name}")
+
+    query_info = QUERIES[query_name]
+    query = TEMPLATES[query_name].bind(parameters)
+    collection = query_collection(collection, query_info)
+
+    # A QueryGovernor adds maxTimeMS and its cancel token, and caps the rows kept
+    options = governor.mongo_options() if governor else {}
+    collect = governor.collect_mongo if governor else list
+
+    # Heavy aggregations are read from their summary collection when it is fresh
+    if use_summaries and summary_is_fresh(collection.database, query_name):
+        return read_summary(collection.database, query_name)
+    if query_info["type"] == "aggregate":
+        return collect(collection.aggregate(query, **options))
+    if query_info["type"] == "count":
+        return collection.count_documents(query, **options)
+    if query_info["type"] == "distinct":
+        values = collection.distinct(query_info["field"], query, **options)
+        return [{query_info["field"]: value} for value in sorted(values)]
+    if query_info["type"] == "find":
+        find_args = {"filter": query}
+        if "projection" in query_info:
+            find_args["projection"] = query_info["projection"]
+        if limit:
+            find_args["limit"] = limit
+        if governor:
+            find_args.update(max_time_ms=governor.max_time_ms, comment=governor.token)
+        return collect(collection.find(**find_args))
+    raise ValueError(f"Unsupported query type: {query_info['type']}")
+
+def neo4j_parameters(query_name: str, parameters: dict = None):
+    # Map the app's input names onto the Cypher parameters of each query
+    parameters = parameters or {}
+    if query_name == "recommended_films_based_on_actor":
+        return {"actorName": parameters.get("actor_name")}
+    if query_name == "shortest_path_between_actors":
+        return {"actorName1": parameters.get("actor_name1"), "actorName2": parameters.get("actor_name2")}
+    return {}
+
+def run_neo4j_query(query_name: str, parameters: dict = None, fetch_size: int = NEO4J_FETCH_SIZE, governor=None):
+    # Returns (frame, paths), see neo4j_results.result_to_frames
+    query_info = NEO4J_QUERIES[query_name]
+    with neo4j_session(fetch_size=fetch_size) as session:
+        ensure_graph_ready(session)
+        return result_to_frames(run_prepared(session, query_info["query"], neo4j_parameters(query_name, parameters),
+                                             governor), governor)
+
+def run_cypher(text: str, governor=None):
+    # Free-form Cypher, e.g. from the app's custom query box
+    with neo4j_session() as session:
+        ensure_graph_ready(session)
+        return result_to_frames(run_prepared(session, text, governor=governor), governor)
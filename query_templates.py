@@ -0,0 +1,68 @@
+# query_templates.py
+# Typed parameters for mongodb_queries.QUERIES. An entry declares its
+# parameters as {"name": type} and marks where they go with Param("name")
+# anywhere inside its filter or pipeline. Each query is compiled once into
+# the paths of its Param slots; binding copies only the dicts and lists on
+# those paths and shares everything else, so a static query binds to itself.
+class Param:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"Param({self.name!r})"
+
+def find_slots(value, path=()):
+    # (path, Param) for every slot, a path being the keys/indexes from the root
+    if isinstance(value, Param):
+        return [(path, value)]
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return []
+    return [slot for key, item in items for slot in find_slots(item, path + (key,))]
+
+def replace_along(value, tree, values):
+    # tree maps each key on a slot path to its subtree, or to the Param at a leaf
+    if isinstance(tree, Param):
+        return values[tree.name]
+    copy = dict(value) if isinstance(value, dict) else list(value)
+    for key, subtree in tree.items():
+        copy[key] = replace_along(value[key], subtree, values)
+    return copy
+
+class CompiledQuery:
+    def __init__(self, query, parameters=None):
+        self.query = query
+        self.parameters = parameters or {}
+        self.slots = find_slots(query)
+        undeclared = {param.name for _, param in self.slots} - set(self.parameters)
+        if undeclared:
+            raise ValueError(f"Undeclared query parameters: {', '.join(sorted(undeclared))}")
+        self.tree = {}
+        for path, param in self.slots:
+            node = self.tree
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = param
+
+    def coerce(self, parameters):
+        values = {}
+        for name, kind in self.parameters.items():
+            value = (parameters or {}).get(name)
+            if value is None or value == "":
+                raise ValueError(f"Missing value for parameter {name}")
+            try:
+                values[name] = kind(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Parameter {name} must be of type {kind.__name__}, got {value!r}")
+        return values
+
+    def bind(self, parameters=None):
+        if not self.slots:
+            return self.query
+        return replace_along(self.query, self.tree, self.coerce(parameters))
+
+def compile_queries(queries):
+    return {name: CompiledQuery(info["query"], info.get("parameters")) for name, info in queries.items()}